@@ -172,14 +172,54 @@ def create_ticket(request: TicketCreateRequest):
         # Use agentic workflow to process and create ticket
         print(f"🚀 Starting agentic workflow for ticket: {request.title}")
 
-        # Process the ticket through the complete agentic workflow
+        def persist_ticket(ticket_data, ticket_number):
+            classified = ticket_data.get("classified_data", {})
+            assignment = ticket_data.get("assignment_result", {})
+
+            # Debug: Print assignment result structure
+            print(f"🔍 Assignment result structure: {assignment}")
+
+            # Insert into Snowflake TICKETS table
+            print(f"💾 Inserting ticket {ticket_number} into database")
+
+            # Extract technician email from assignment result
+            technician_email = ""
+            if assignment:
+                # Check if assignment_result is nested
+                if "assignment_result" in assignment:
+                    technician_email = assignment["assignment_result"].get("technician_email", "")
+                else:
+                    technician_email = assignment.get("technician_email", "")
+
+            print(f"🔍 Technician email to save: '{technician_email}'")
+
+            inserted = snowflake_conn.insert_ticket(
+                ticket_number=ticket_number,
+                title=request.title,
+                description=request.description,
+                due_date=request.due_date,
+                priority=classified.get("PRIORITY", {}).get("Label", request.priority or "Medium"),
+                status=classified.get("STATUS", {}).get("Label", "Open"),
+                technician_email=technician_email,
+                user_email=request.user_email or "",
+                user_id=request.requester_name or "Anonymous"
+            )
+            if inserted is None:
+                raise HTTPException(status_code=500, detail=f"Failed to save ticket {ticket_number} to the database")
+            if inserted:
+                print(f"✅ Ticket {ticket_number} successfully inserted into database")
+            return inserted
+
+        # Process the ticket through the complete agentic workflow; the ticket is stored
+        # before the confirmation email goes out
         result = intake_agent.process_new_ticket(
             ticket_name=request.requester_name or "Anonymous",
             ticket_description=request.description,
             ticket_title=request.title,
             due_date=request.due_date,
             priority_initial=request.priority or "Medium",
-            user_email=request.user_email
+            user_email=request.user_email,
+            persist_ticket=persist_ticket
         )
 
         if not result:
@@ -196,44 +236,6 @@ def create_ticket(request: TicketCreateRequest):
         classified = result.get("classified_data", {})
         assignment = result.get("assignment_result", {})
 
-        # Debug: Print assignment result structure
-        print(f"🔍 Assignment result structure: {assignment}")
-
-        # Insert into Snowflake TICKETS table
-        print(f"💾 Inserting ticket {ticket_number} into database")
-
-        # Extract technician email from assignment result
-        technician_email = ""
-        if assignment:
-            # Check if assignment_result is nested
-            if "assignment_result" in assignment:
-                technician_email = assignment["assignment_result"].get("technician_email", "")
-            else:
-                technician_email = assignment.get("technician_email", "")
-
-        print(f"🔍 Technician email to save: '{technician_email}'")
-
-        insert_query = """
-            INSERT INTO TEST_DB.PUBLIC.TICKETS (
-                TICKETNUMBER, TITLE, DESCRIPTION, DUEDATETIME, PRIORITY, STATUS,
-                TECHNICIANEMAIL, USEREMAIL, USERID
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        params = (
-            ticket_number,
-            request.title,
-            request.description,
-            request.due_date,
-            classified.get("PRIORITY", {}).get("Label", request.priority or "Medium"),
-            classified.get("STATUS", {}).get("Label", "Open"),
-            technician_email,
-            request.user_email or "",
-            request.requester_name or "Anonymous"
-        )
-
-        insert_result = snowflake_conn.execute_query(insert_query, params)
-        print(f"✅ Ticket {ticket_number} successfully inserted into database")
-
         return TicketResponse(
             ticket_number=ticket_number,
             status="created",
@@ -245,6 +247,8 @@ def create_ticket(request: TicketCreateRequest):
             technician_email=assignment.get("technician_email", "")
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error creating ticket: {str(e)}")
         import traceback
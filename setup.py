@@ -17,9 +17,14 @@ setup(
         "numpy>=1.21.0",
         "schedule>=1.2.0",
         "pandas",
-        "pytz",
         "snowflake-connector-python",
         "python-dotenv",
         "scikit-learn",
     ],
+    extras_require={
+        # Concurrent confirmation emails via NotificationAgent.send_ticket_confirmations_async
+        "async-email": ["aiosmtplib>=2.0"],
+        # Faster parsing of Cortex JSON responses in SnowflakeConnection.call_cortex_llm
+        "fast-json": ["orjson>=3.0"],
+    },
 )
@@ -20,6 +20,22 @@ from dataclasses import dataclass
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fields an incoming ticket must carry before it can be assigned
+REQUIRED_TICKET_FIELDS = (
+    'TICKETNUMBER', 'issue_type', 'sub_issue_type', 'ticket_category',
+    'priority', 'description', 'requester_name', 'requester_email', 'due_date'
+)
+
+STANDARD_PRIORITIES = frozenset(['Low', 'Medium', 'High', 'Critical'])
+
+# Complexity level assumed from the priority when the LLM skill analysis is unavailable
+PRIORITY_COMPLEXITY = {
+    'Low': 2,
+    'Medium': 3,
+    'High': 4,
+    'Critical': 5
+}
+
 @dataclass
 class TicketData:
     """Data class for ticket information"""
@@ -128,11 +144,11 @@ class AssignmentAgentIntegration:
                 'due_date': new_ticket.get('due_date', '')
             }
             
-            logger.info(f"Mapped intake data to assignment format for ticket: {assignment_input['TICKETNUMBER']}")
+            logger.info("Mapped intake data to assignment format for ticket: %s", assignment_input['TICKETNUMBER'])
             return assignment_input
             
         except Exception as e:
-            logger.error(f"Error mapping intake data to assignment format: {str(e)}")
+            logger.error("Error mapping intake data to assignment format: %s", e)
             raise AssignmentError(f"Failed to map intake data: {str(e)}")
 
     def _validate_ticket_data(self, ticket_data: Dict) -> TicketData:
@@ -148,19 +164,13 @@ class AssignmentAgentIntegration:
         Raises:
             ValueError: If required fields are missing or invalid
         """
-        required_fields = [
-            'TICKETNUMBER', 'issue_type', 'sub_issue_type', 'ticket_category',
-            'priority', 'description', 'requester_name', 'requester_email', 'due_date'
-        ]
-
-        missing_fields = [field for field in required_fields if field not in ticket_data or not ticket_data[field]]
+        missing_fields = [field for field in REQUIRED_TICKET_FIELDS if field not in ticket_data or not ticket_data[field]]
         if missing_fields:
             raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
 
         # Validate priority level
-        valid_priorities = ['Low', 'Medium', 'High', 'Critical']
-        if ticket_data['priority'] not in valid_priorities:
-            logger.warning(f"Priority '{ticket_data['priority']}' not in standard list, proceeding anyway")
+        if ticket_data['priority'] not in STANDARD_PRIORITIES:
+            logger.warning("Priority '%s' not in standard list, proceeding anyway", ticket_data['priority'])
 
         return TicketData(
             ticket_number=str(ticket_data['TICKETNUMBER']),
@@ -214,14 +224,14 @@ class AssignmentAgentIntegration:
             """
 
             # Execute Cortex LLM query
-            cortex_query = f"""
+            cortex_query = """
             SELECT SNOWFLAKE.CORTEX.COMPLETE(
                 'mixtral-8x7b',
-                '{prompt.replace("'", "''")}'
+                %s
             ) as analysis_result
             """
 
-            cursor.execute(cortex_query)
+            cursor.execute(cortex_query, (prompt,))
             result = cursor.fetchone()
 
             if result and result[0]:
@@ -233,14 +243,14 @@ class AssignmentAgentIntegration:
                         specialized_knowledge=analysis_json.get('specialized_knowledge', [])
                     )
                 except (json.JSONDecodeError, ValueError, KeyError) as e:
-                    logger.warning(f"Failed to parse Cortex LLM response: {str(e)}")
+                    logger.warning("Failed to parse Cortex LLM response: %s", e)
                     return self._fallback_skill_analysis(ticket)
             else:
                 logger.warning("Empty response from Cortex LLM")
                 return self._fallback_skill_analysis(ticket)
 
         except Exception as e:
-            logger.error(f"Error in Cortex skill analysis: {str(e)}")
+            logger.error("Error in Cortex skill analysis: %s", e)
             return self._fallback_skill_analysis(ticket)
         finally:
             if cursor:
@@ -262,13 +272,7 @@ class AssignmentAgentIntegration:
         required_skills = self.fallback_skill_mapping.get(ticket.issue_type, ['General IT Support'])
 
         # Determine complexity based on priority and issue type
-        complexity_mapping = {
-            'Low': 2,
-            'Medium': 3,
-            'High': 4,
-            'Critical': 5
-        }
-        complexity_level = complexity_mapping.get(ticket.priority, 3)
+        complexity_level = PRIORITY_COMPLEXITY.get(ticket.priority, 3)
 
         # Basic specialized knowledge
         specialized_knowledge = [ticket.issue_type] if ticket.issue_type else []
@@ -334,14 +338,14 @@ class AssignmentAgentIntegration:
                         specializations=[str(row[2])] if row[2] else []  # Use ROLE as specialization
                     ))
                 except Exception as e:
-                    logger.warning(f"Error parsing technician data for row {row}: {str(e)}")
+                    logger.warning("Error parsing technician data for row %s: %s", row, e)
                     continue
 
-            logger.info(f"Retrieved {len(technicians)} available technicians from TECHNICIAN_DUMMY_DATA")
+            logger.info("Retrieved %d available technicians from TECHNICIAN_DUMMY_DATA", len(technicians))
             return technicians
 
         except Exception as e:
-            logger.error(f"Error retrieving technicians: {str(e)}")
+            logger.error("Error retrieving technicians: %s", e)
             return []
         finally:
             if cursor:
@@ -457,13 +461,16 @@ class AssignmentAgentIntegration:
             tech_name = technician.get('technician_name', 'Unknown')
             tech_email = technician.get('technician_email', 'unknown@company.com')
 
+        # One clock read, so the date and time always describe the same instant
+        assigned_at = datetime.now()
+
         return {
             'assignment_result': {
                 'ticket_number': ticket.ticket_number,
                 'assigned_technician': tech_name,
                 'technician_email': tech_email,
-                'assignment_date': datetime.now().strftime('%Y-%m-%d'),
-                'assignment_time': datetime.now().strftime('%H:%M:%S'),
+                'assignment_date': assigned_at.date().isoformat(),
+                'assignment_time': assigned_at.time().isoformat(timespec='seconds'),
                 'priority': ticket.priority,
                 'issue_type': ticket.issue_type,
                 'sub_issue_type': ticket.sub_issue_type,
@@ -495,13 +502,13 @@ class AssignmentAgentIntegration:
 
             # Step 2: Validate ticket data
             ticket = self._validate_ticket_data(assignment_input)
-            logger.info(f"Processing assignment for ticket: {ticket.ticket_number}")
+            logger.info("Processing assignment for ticket: %s", ticket.ticket_number)
 
             # Step 3: Analyze skill requirements
             logger.info("Analyzing skill requirements...")
             skill_analysis = self._analyze_skills_with_cortex(ticket)
-            logger.info(f"Required skills: {skill_analysis.required_skills}, "
-                       f"Complexity: {skill_analysis.complexity_level}")
+            logger.info("Required skills: %s, Complexity: %s",
+                        skill_analysis.required_skills, skill_analysis.complexity_level)
 
             # Step 4: Get available technicians
             logger.info("Retrieving available technicians...")
@@ -517,11 +524,13 @@ class AssignmentAgentIntegration:
             )
 
             # Step 6: Log assignment decision
-            logger.info(f"Assignment decision: {reasoning}")
+            logger.info("Assignment decision: %s", reasoning)
 
             # Step 7: Create and return response
             assignment_response = self._create_assignment_response(ticket, best_technician)
-            logger.info(f"Successfully assigned ticket {ticket.ticket_number} to {best_technician.get('technician_name', 'Unknown') if isinstance(best_technician, dict) else best_technician.technician_name}")
+            logger.info("Successfully assigned ticket %s to %s", ticket.ticket_number,
+                        best_technician.get('technician_name', 'Unknown') if isinstance(best_technician, dict)
+                        else best_technician.technician_name)
 
             return assignment_response
 
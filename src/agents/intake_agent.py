@@ -6,9 +6,14 @@ This is the main class that provides the same interface as the original monolith
 import json
 import uuid
 import hashlib
+import logging
 import os
+import sqlite3
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
+from functools import lru_cache
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional
 
 import sys
 import os
@@ -17,9 +22,36 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from src.database import SnowflakeConnection
 from src.data import DataManager
 from src.processors import AIProcessor, TicketProcessor
-from src.agents.notification_agent import NotificationAgent
+from src.processors.ai_processor import CLASSIFICATION_FALLBACK_FLAG, RESOLUTION_UNAVAILABLE_NOTE
+from src.cache import SemanticTicketCache, LLMResponseCache
+from src.agents.notification_agent import NotificationAgent, is_valid_email
 from src.agents.assignment_agent import AssignmentAgentIntegration
 
+logger = logging.getLogger(__name__)
+
+SEQUENCE_DB_FILE = "data/ticket_sequence.db"
+LEGACY_SEQUENCE_FILE = "data/ticket_sequence.json"
+
+# Fresh ticket numbers tried when the persisted number turns out to be taken already
+MAX_TICKET_NUMBER_ATTEMPTS = 3
+
+# Shared worker threads for the parts of ticket processing that run alongside the main
+# thread (resolution note generation, the confirmation email), so a ticket does not
+# start and tear down executors of its own
+_INTAKE_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='intake')
+
+# Similar-ticket rows always carry these columns (see SnowflakeConnection.find_similar_tickets)
+_issuetype_priority = itemgetter('ISSUETYPE', 'PRIORITY')
+
+
+@lru_cache(maxsize=4)
+def _get_data_manager(data_ref_file: str) -> DataManager:
+    """
+    Returns a DataManager shared by every agent using the same reference file,
+    so the reference data is parsed once per process rather than once per agent.
+    """
+    return DataManager(data_ref_file)
+
 
 class IntakeClassificationAgent:
     """
@@ -54,25 +86,53 @@ class IntakeClassificationAgent:
             role=sf_role
         )
 
-        # Initialize data manager
-        self.data_manager = DataManager(data_ref_file)
+        # Initialize data manager (shared per reference file within the process)
+        self.data_manager = _get_data_manager(data_ref_file)
 
         # Initialize AI processor
-        self.ai_processor = AIProcessor(self.db_connection, self.data_manager.reference_data)
+        self.ai_processor = AIProcessor(self.db_connection, self.data_manager.reference_data,
+                                        llm_cache=LLMResponseCache())
 
         # Initialize ticket processor
         self.ticket_processor = TicketProcessor(self.data_manager.reference_data)
 
-        # Initialize notification agent
-        self.notification_agent = NotificationAgent()
+        # Notification and assignment agents are created on first use (or injected by the caller)
+        self._notification_agent = None
+        self._assignment_agent = None
 
-        # Initialize assignment agent
-        self.assignment_agent = AssignmentAgentIntegration(self.db_connection)
+        # Cache of LLM results for identical / near-identical recent tickets
+        self.semantic_cache = SemanticTicketCache()
 
         # Expose connection and reference data for backward compatibility
         self.conn = self.db_connection.conn
         self.reference_data = self.data_manager.reference_data
 
+    @property
+    def notification_agent(self) -> NotificationAgent:
+        """
+        Notification agent, created on first access unless one was assigned.
+        """
+        if self._notification_agent is None:
+            self._notification_agent = NotificationAgent()
+        return self._notification_agent
+
+    @notification_agent.setter
+    def notification_agent(self, agent: NotificationAgent):
+        self._notification_agent = agent
+
+    @property
+    def assignment_agent(self) -> AssignmentAgentIntegration:
+        """
+        Assignment agent, created on first access unless one was assigned.
+        """
+        if self._assignment_agent is None:
+            self._assignment_agent = AssignmentAgentIntegration(self.db_connection)
+        return self._assignment_agent
+
+    @assignment_agent.setter
+    def assignment_agent(self, agent: AssignmentAgentIntegration):
+        self._assignment_agent = agent
+
     def generate_ticket_number(self, ticket_data: Dict) -> str:
         """
         Generate a unique ticket number in format T20240916.0057
@@ -93,12 +153,14 @@ class IntakeClassificationAgent:
         # Generate ticket number: TYYYYMMDD.NNNN
         ticket_number = f"T{date_part}.{sequence_number:04d}"
 
-        print(f"Generated ticket number: {ticket_number}")
+        logger.debug("Generated ticket number: %s", ticket_number)
         return ticket_number
 
     def _get_next_sequence_number(self, date_part: str) -> int:
         """
         Get the next sequential number for the given date.
+        The per-day counters live in a SQLite file and are incremented in a single
+        write transaction, so concurrent workers never hand out the same number.
 
         Args:
             date_part (str): Date in YYYYMMDD format
@@ -106,34 +168,58 @@ class IntakeClassificationAgent:
         Returns:
             int: Next sequential number
         """
-        sequence_file = "data/ticket_sequence.json"
+        os.makedirs(os.path.dirname(SEQUENCE_DB_FILE), exist_ok=True)
 
-        # Load existing sequence data
-        sequence_data = {}
-        if os.path.exists(sequence_file):
+        conn = sqlite3.connect(SEQUENCE_DB_FILE, timeout=30, isolation_level=None)
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ticket_sequence ("
+                "date_part TEXT PRIMARY KEY, last_number INTEGER NOT NULL)"
+            )
+            conn.execute("BEGIN IMMEDIATE")
             try:
-                with open(sequence_file, 'r') as f:
-                    sequence_data = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                sequence_data = {}
+                if conn.execute("SELECT COUNT(*) FROM ticket_sequence").fetchone()[0] == 0:
+                    self._seed_sequence_from_json(conn)
+
+                conn.execute(
+                    "INSERT INTO ticket_sequence (date_part, last_number) VALUES (?, 1) "
+                    "ON CONFLICT(date_part) DO UPDATE SET last_number = last_number + 1",
+                    (date_part,)
+                )
+                next_sequence = conn.execute(
+                    "SELECT last_number FROM ticket_sequence WHERE date_part = ?", (date_part,)
+                ).fetchone()[0]
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
 
-        # Get current sequence for this date, default to 0
-        current_sequence = sequence_data.get(date_part, 0)
+        return next_sequence
 
-        # Increment sequence
-        next_sequence = current_sequence + 1
+    def _seed_sequence_from_json(self, conn: sqlite3.Connection):
+        """
+        Carry the counters over from the legacy ticket_sequence.json file, if present,
+        so numbering continues where it left off.
 
-        # Update sequence data
-        sequence_data[date_part] = next_sequence
+        Args:
+            conn (sqlite3.Connection): Connection with an open write transaction
+        """
+        if not os.path.exists(LEGACY_SEQUENCE_FILE):
+            return
 
-        # Save updated sequence data
         try:
-            with open(sequence_file, 'w') as f:
-                json.dump(sequence_data, f, indent=2)
-        except Exception as e:
-            print(f"Warning: Could not save sequence file: {e}")
-
-        return next_sequence
+            with open(LEGACY_SEQUENCE_FILE, 'r') as f:
+                sequence_data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Warning: Could not read legacy sequence file: {e}")
+            return
+
+        conn.executemany(
+            "INSERT OR IGNORE INTO ticket_sequence (date_part, last_number) VALUES (?, ?)",
+            [(str(day), int(number)) for day, number in sequence_data.items()]
+        )
 
     def extract_metadata(self, title: str, description: str, model: str = 'llama3-8b') -> Optional[Dict]:
         """
@@ -168,9 +254,68 @@ class IntakeClassificationAgent:
         """
         self.data_manager.save_to_knowledgebase(new_ticket_full_data, similar_tickets_metadata)
 
+    def _analyze_ticket(self, new_ticket_raw: Dict, extract_model: str,
+                        classify_model: str) -> Optional[tuple]:
+        """
+        Runs the LLM stages for a new ticket: metadata extraction, similar-ticket search,
+        classification and (on the shared intake pool) resolution note generation.
+
+        Args:
+            new_ticket_raw (dict): Raw ticket fields
+            extract_model (str): Model to use for metadata extraction.
+            classify_model (str): Model to use for classification.
+
+        Returns:
+            tuple: (extracted_metadata, similar_tickets, classified_data, resolution_future),
+                or None if extraction or classification fails.
+        """
+        ticket_title = new_ticket_raw["title"]
+        ticket_description = new_ticket_raw["description"]
+
+        # Extract metadata
+        extracted_metadata = self.extract_metadata(ticket_title, ticket_description, model=extract_model)
+        if not extracted_metadata:
+            print("Failed to extract metadata. Aborting ticket processing.")
+            return None
+        print("Extracted Metadata:")
+        print(json.dumps(extracted_metadata, indent=2))
+
+        # The resolution note is built from the extracted metadata only, so its
+        # Cortex call can run while similar tickets are searched and classified.
+        resolution_future = _INTAKE_POOL.submit(
+            self.generate_resolution_note, new_ticket_raw, {}, extracted_metadata
+        )
+
+        # Find similar tickets
+        similar_tickets = self.find_similar_tickets(extracted_metadata)
+        if similar_tickets:
+            print(f"\nFound {len(similar_tickets)} similar tickets:")
+            issuetype_map = self.reference_data.get('issuetype', {})
+            priority_map = self.reference_data.get('priority', {})
+            labels = [
+                (issuetype_map.get(str(issue_type), 'N/A'), priority_map.get(str(priority), 'N/A'))
+                for issue_type, priority in map(_issuetype_priority, similar_tickets)
+            ]
+            for i, (ticket, (issue_type_label, priority_label)) in enumerate(zip(similar_tickets, labels)):
+                print(f"  {i+1}. Title: {ticket.get('TITLE', 'N/A')}, Type: {issue_type_label}, Priority: {priority_label}")
+        else:
+            print("\nNo similar tickets found.")
+
+        # Classify ticket
+        classified_data = self.classify_ticket(new_ticket_raw, extracted_metadata, similar_tickets, model=classify_model)
+        if not classified_data:
+            print("Failed to classify ticket. Aborting ticket processing.")
+            resolution_future.cancel()
+            return None
+        print("\nClassified Ticket Data:")
+        print(json.dumps(classified_data, indent=2))
+
+        return extracted_metadata, similar_tickets, classified_data, resolution_future
+
     def process_new_ticket(self, ticket_name: str, ticket_description: str, ticket_title: str,
                           due_date: str, priority_initial: str, user_email: Optional[str] = None,
-                          extract_model: str = 'llama3-8b', classify_model: str = 'mixtral-8x7b') -> Optional[Dict]:
+                          extract_model: str = 'llama3-8b', classify_model: str = 'mixtral-8x7b',
+                          persist_ticket: Optional[Callable[[Dict, str], bool]] = None) -> Optional[Dict]:
         """
         Orchestrates the entire process for a new incoming ticket.
 
@@ -183,6 +328,9 @@ class IntakeClassificationAgent:
             user_email (str, optional): User's email address for notifications.
             extract_model (str): Model to use for metadata extraction.
             classify_model (str): Model to use for classification.
+            persist_ticket (callable, optional): Stores the final ticket data under the given
+                ticket number and returns False if that number is already taken. It runs before
+                the confirmation email and knowledge base entry, with a fresh number on each retry.
 
         Returns:
             dict: The classified ticket data, or None if the process fails.
@@ -190,8 +338,8 @@ class IntakeClassificationAgent:
         print(f"\n--- Processing New Ticket: '{ticket_title}' ---")
 
         creation_time = datetime.now()
-        ticket_date = creation_time.strftime("%Y-%m-%d")
-        ticket_time = creation_time.strftime("%H:%M:%S")
+        ticket_date = creation_time.date().isoformat()
+        ticket_time = creation_time.time().isoformat(timespec='seconds')
 
         new_ticket_raw = {
             "name": ticket_name,
@@ -206,50 +354,35 @@ class IntakeClassificationAgent:
         # Generate unique ticket number
         ticket_number = self.generate_ticket_number(new_ticket_raw)
 
-        # Extract metadata
-        extracted_metadata = self.extract_metadata(ticket_title, ticket_description, model=extract_model)
-        if not extracted_metadata:
-            print("Failed to extract metadata. Aborting ticket processing.")
-            return None
-        print("Extracted Metadata:")
-        print(json.dumps(extracted_metadata, indent=2))
-
-        # Find similar tickets
-        similar_tickets = self.find_similar_tickets(extracted_metadata)
-        if similar_tickets:
-            print(f"\nFound {len(similar_tickets)} similar tickets:")
-            for i, ticket in enumerate(similar_tickets):
-                issue_type_label = self.reference_data.get('issuetype', {}).get(str(ticket.get('ISSUETYPE')), 'N/A')
-                priority_label = self.reference_data.get('priority', {}).get(str(ticket.get('PRIORITY')), 'N/A')
-                print(f"  {i+1}. Title: {ticket.get('TITLE', 'N/A')}, Type: {issue_type_label}, Priority: {priority_label}")
+        # Reuse the LLM results of an identical or near-identical recent ticket if there is one;
+        # the initial priority goes into the classification prompt, so it is part of the key
+        cache_namespace = f"{extract_model}|{classify_model}|{priority_initial}"
+        cached = self.semantic_cache.lookup(ticket_title, ticket_description, namespace=cache_namespace)
+
+        if cached:
+            print("\n--- Reusing analysis of a near-identical recent ticket ---")
+            extracted_metadata = cached["extracted_metadata"]
+            similar_tickets = cached["similar_tickets"]
+            classified_data = cached["classified_data"]
+            resolution_future = Future()
+            resolution_future.set_result(cached["resolution_note"])
         else:
-            print("\nNo similar tickets found.")
+            analysis = self._analyze_ticket(new_ticket_raw, extract_model, classify_model)
+            if analysis is None:
+                return None
+            extracted_metadata, similar_tickets, classified_data, resolution_future = analysis
 
-        # Classify ticket
-        classified_data = self.classify_ticket(new_ticket_raw, extracted_metadata, similar_tickets, model=classify_model)
-        if not classified_data:
-            print("Failed to classify ticket. Aborting ticket processing.")
-            return None
-        print("\nClassified Ticket Data:")
-        print(json.dumps(classified_data, indent=2))
-
-        # Generate resolution note
-        print("\n--- Generating Resolution Note ---")
-        resolution_note = self.generate_resolution_note(new_ticket_raw, classified_data, extracted_metadata)
-        print("Generated Resolution Note:")
-        print(resolution_note)
-
-        # Prepare final ticket data
+        # Prepare final ticket data; the resolution note is filled in once it is ready
         final_ticket_data = {
             **new_ticket_raw,
             "ticket_number": ticket_number,
             "user_email": user_email if user_email and user_email.strip() else "",
             "extracted_metadata": extracted_metadata,
             "classified_data": classified_data,
-            "resolution_note": resolution_note
+            "resolution_note": None
         }
 
-        # Process assignment after classification
+        # Process assignment after classification, while the resolution note is still generating
         print("\n--- Processing Ticket Assignment ---")
         try:
             assignment_result = self.assignment_agent.process_ticket_assignment({"new_ticket": final_ticket_data})
@@ -266,6 +399,23 @@ class IntakeClassificationAgent:
                 "technician_email": "itmanager@company.com"
             }
 
+        # Generate resolution note
+        print("\n--- Generating Resolution Note ---")
+        resolution_note = resolution_future.result()
+        print("Generated Resolution Note:")
+        print(resolution_note)
+        final_ticket_data["resolution_note"] = resolution_note
+
+        # Results patched together after an LLM failure are not worth reusing
+        if (not cached and resolution_note != RESOLUTION_UNAVAILABLE_NOTE
+                and not classified_data.get(CLASSIFICATION_FALLBACK_FLAG)):
+            self.semantic_cache.store(ticket_title, ticket_description, {
+                "extracted_metadata": extracted_metadata,
+                "similar_tickets": similar_tickets,
+                "classified_data": classified_data,
+                "resolution_note": resolution_note
+            }, namespace=cache_namespace)
+
         # Prepare similar tickets for knowledge base
         similar_tickets_for_kb = []
         for ticket in similar_tickets:
@@ -284,17 +434,46 @@ class IntakeClassificationAgent:
 
             similar_tickets_for_kb.append(kb_ticket)
 
-        # Save to knowledge base
-        self.save_to_knowledgebase(final_ticket_data, similar_tickets_for_kb)
-
-        # Send notification email if user email is provided
-        if user_email and user_email.strip():
+        if persist_ticket is not None:
+            for attempt in range(MAX_TICKET_NUMBER_ATTEMPTS):
+                if persist_ticket(final_ticket_data, ticket_number):
+                    break
+                if attempt + 1 == MAX_TICKET_NUMBER_ATTEMPTS:
+                    print(f"❌ Could not find a free ticket number after {MAX_TICKET_NUMBER_ATTEMPTS} attempts")
+                    return None
+                print(f"⚠️ Ticket number {ticket_number} is already taken, generating a new one")
+                ticket_number = self.generate_ticket_number(new_ticket_raw)
+
+            # The stored number is the one the email, knowledge base and caller see
+            final_ticket_data["ticket_number"] = ticket_number
+            if "ticket_number" in final_ticket_data["assignment_result"]:
+                final_ticket_data["assignment_result"]["ticket_number"] = ticket_number
+
+        # Send notification email if user email is provided; the SMTP round-trip
+        # runs while the knowledge base file is written
+        email_future = None
+        if user_email and user_email.strip() and not is_valid_email(user_email):
+            print(f"⚠️ Skipping confirmation email: '{user_email}' is not a valid email address")
+        elif user_email and user_email.strip():
             print(f"\n--- Sending Confirmation Email to {user_email} ---")
-            email_sent = self.notification_agent.send_ticket_confirmation(
+            email_future = _INTAKE_POOL.submit(
+                self.notification_agent.send_ticket_confirmation,
                 user_email=user_email,
                 ticket_data=final_ticket_data,
                 ticket_number=ticket_number
             )
+
+        # Save to knowledge base
+        self.save_to_knowledgebase(final_ticket_data, similar_tickets_for_kb)
+
+        if email_future is not None:
+            # A malformed ticket can make message building fail; that must not abort
+            # a ticket that is already stored and written to the knowledge base
+            try:
+                email_sent = email_future.result()
+            except Exception:
+                logger.exception("Error sending confirmation email for ticket %s", ticket_number)
+                email_sent = False
             if email_sent:
                 print("✅ Confirmation email sent successfully")
             else:
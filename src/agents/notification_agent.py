@@ -3,126 +3,70 @@ Notification Agent for sending email confirmations to users.
 Handles SMTP email sending functionality for ticket confirmations.
 """
 
-import smtplib
+import asyncio
 import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import queue
+import re
+import threading
+import time
+import weakref
 from datetime import datetime
-from typing import Optional, Dict
+from html import escape
+from typing import Optional, Dict, List, Tuple, TYPE_CHECKING
 import logging
 
+try:
+    import aiosmtplib
+except ImportError:  # optional, only needed for send_ticket_confirmations_async
+    aiosmtplib = None
+
+# smtplib and the email package are imported where a message is built or sent, so creating the
+# agent (or importing this module) does not pay for loading the mail stack
+if TYPE_CHECKING:
+    import smtplib
+    from email.message import EmailMessage
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class NotificationAgent:
+# A pooled SMTP session idle for longer than this is probed with NOOP before reuse
+SMTP_IDLE_CHECK_SECONDS = 30
+
+# Sessions are recycled after this many messages to stay under per-connection provider limits
+SMTP_MAX_MESSAGES_PER_CONNECTION = 100
+
+# Deliberately loose: rejects obviously malformed addresses before paying for an SMTP session
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def is_valid_email(address: Optional[str]) -> bool:
     """
-    Handles email notifications for ticket confirmations.
+    Check that an address looks deliverable (something@domain.tld, no whitespace).
     """
-    
-    def __init__(self):
-        """
-        Initialize the notification agent with SMTP configuration.
-        """
-        # SMTP Configuration from environment variables
-        self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-        self.smtp_port = int(os.getenv('SMTP_PORT', '587'))
-        self.smtp_username = os.getenv('SMTP_USERNAME', os.getenv('EMAIL_ACCOUNT', 'rohankul2017@gmail.com'))
-        self.smtp_password = os.getenv('SMTP_PASSWORD', os.getenv('SUPPORT_EMAIL_PASSWORD'))
-        self.from_email = os.getenv('FROM_EMAIL', self.smtp_username)
-        self.from_name = os.getenv('FROM_NAME', 'TeamLogic Support')
-        
-        # Validate configuration
-        if not self.smtp_password:
-            logger.warning("SMTP password not configured. Email notifications will be disabled.")
-            self.enabled = False
-        else:
-            self.enabled = True
-            logger.info("Notification agent initialized successfully")
-    
-    def send_ticket_confirmation(self, user_email: str, ticket_data: Dict, ticket_number: str) -> bool:
-        """
-        Send a ticket confirmation email to the user.
-        
-        Args:
-            user_email (str): User's email address
-            ticket_data (dict): Ticket information
-            ticket_number (str): Generated ticket number
-            
-        Returns:
-            bool: True if email sent successfully, False otherwise
-        """
-        if not self.enabled:
-            logger.warning("Email notifications are disabled due to missing SMTP configuration")
-            return False
-            
-        if not user_email or not user_email.strip():
-            logger.warning("No user email provided for notification")
-            return False
-            
-        try:
-            # Create email message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = f"Ticket Confirmation - #{ticket_number}"
-            msg['From'] = f"{self.from_name} <{self.from_email}>"
-            msg['To'] = user_email
-            
-            # Create email content
-            html_content = self._create_confirmation_email_html(ticket_data, ticket_number)
-            text_content = self._create_confirmation_email_text(ticket_data, ticket_number)
-            
-            # Attach both text and HTML versions
-            text_part = MIMEText(text_content, 'plain')
-            html_part = MIMEText(html_content, 'html')
-            
-            msg.attach(text_part)
-            msg.attach(html_part)
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                # Ensure smtp_password is not None (should be guaranteed by enabled check)
-                if self.smtp_password is None:
-                    raise ValueError("SMTP password is not configured")
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
-                
-            logger.info(f"Confirmation email sent successfully to {user_email} for ticket #{ticket_number}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to send confirmation email to {user_email}: {str(e)}")
-            return False
-    
-    def _create_confirmation_email_html(self, ticket_data: Dict, ticket_number: str) -> str:
-        """
-        Create HTML version of the confirmation email.
-        """
-        classified_data = ticket_data.get('classified_data', {})
-        extracted_metadata = ticket_data.get('extracted_metadata', {})
-        resolution_note = ticket_data.get('resolution_note', 'No resolution note available')
-        
-        # Get classification labels
-        issue_type = classified_data.get('ISSUETYPE', {}).get('Label', 'N/A')
-        priority = classified_data.get('PRIORITY', {}).get('Label', 'N/A')
-        ticket_type = classified_data.get('TICKETTYPE', {}).get('Label', 'N/A')
-        
-        # Format resolution note for HTML
-        resolution_html = resolution_note.replace('\n', '<br>')
-        
-        html_content = f"""
+    return bool(address) and _EMAIL_RE.match(address.strip()) is not None
+
+
+# Stylesheet shared by the HTML emails, kept compact since it is sent with every message
+_BASE_CSS = (
+    "body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }\n"
+    ".header { background-color: #2c3e50; color: white; padding: 20px; text-align: center; }\n"
+    ".content { padding: 20px; }\n"
+    ".ticket-info { background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 15px 0; }\n"
+    ".resolution { background-color: #e8f5e8; padding: 15px; border-radius: 5px; border-left: 4px solid #28a745; }\n"
+    ".footer { background-color: #f8f9fa; padding: 15px; text-align: center; font-size: 12px; color: #666; }\n"
+    ".ticket-number { font-size: 24px; font-weight: bold; color: #e74c3c; }"
+)
+
+# Confirmation email bodies, filled in with str.format_map() per message
+# The stylesheet is spliced in at import time (braces doubled for format_map), not per render
+_CONFIRMATION_HTML_TEMPLATE = """
         <!DOCTYPE html>
         <html>
         <head>
             <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .header {{ background-color: #2c3e50; color: white; padding: 20px; text-align: center; }}
-                .content {{ padding: 20px; }}
-                .ticket-info {{ background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 15px 0; }}
-                .resolution {{ background-color: #e8f5e8; padding: 15px; border-radius: 5px; border-left: 4px solid #28a745; }}
-                .footer {{ background-color: #f8f9fa; padding: 15px; text-align: center; font-size: 12px; color: #666; }}
-                .ticket-number {{ font-size: 24px; font-weight: bold; color: #e74c3c; }}
+""" + _BASE_CSS.replace('{', '{{').replace('}', '}}') + """
             </style>
         </head>
         <body>
@@ -139,10 +83,10 @@ class NotificationAgent:
                     <h3>Ticket Information</h3>
                     <table style="width: 100%; border-collapse: collapse;">
                         <tr><td style="padding: 5px; font-weight: bold;">Ticket Number:</td><td style="padding: 5px;">#{ticket_number}</td></tr>
-                        <tr><td style="padding: 5px; font-weight: bold;">Title:</td><td style="padding: 5px;">{ticket_data.get('title', 'N/A')}</td></tr>
-                        <tr><td style="padding: 5px; font-weight: bold;">Submitted By:</td><td style="padding: 5px;">{ticket_data.get('name', 'N/A')}</td></tr>
-                        <tr><td style="padding: 5px; font-weight: bold;">Date Created:</td><td style="padding: 5px;">{ticket_data.get('date', 'N/A')} {ticket_data.get('time', 'N/A')}</td></tr>
-                        <tr><td style="padding: 5px; font-weight: bold;">Due Date:</td><td style="padding: 5px;">{ticket_data.get('due_date', 'N/A')}</td></tr>
+                        <tr><td style="padding: 5px; font-weight: bold;">Title:</td><td style="padding: 5px;">{title}</td></tr>
+                        <tr><td style="padding: 5px; font-weight: bold;">Submitted By:</td><td style="padding: 5px;">{name}</td></tr>
+                        <tr><td style="padding: 5px; font-weight: bold;">Date Created:</td><td style="padding: 5px;">{date} {time}</td></tr>
+                        <tr><td style="padding: 5px; font-weight: bold;">Due Date:</td><td style="padding: 5px;">{due_date}</td></tr>
                         <tr><td style="padding: 5px; font-weight: bold;">Priority:</td><td style="padding: 5px;">{priority}</td></tr>
                         <tr><td style="padding: 5px; font-weight: bold;">Issue Type:</td><td style="padding: 5px;">{issue_type}</td></tr>
                         <tr><td style="padding: 5px; font-weight: bold;">Ticket Type:</td><td style="padding: 5px;">{ticket_type}</td></tr>
@@ -163,7 +107,7 @@ class NotificationAgent:
                     <li>You can reference this ticket using number <strong>#{ticket_number}</strong></li>
                 </ol>
                 
-                <p><strong>Need immediate assistance?</strong> Contact our support team at {os.getenv('SUPPORT_EMAIL', 'rohankul2017@gmail.com')} or {os.getenv('SUPPORT_PHONE', '9723100860')}</p>
+                <p><strong>Need immediate assistance?</strong> Contact our support team at {support_email} or {support_phone}</p>
             </div>
             
             <div class="footer">
@@ -173,22 +117,8 @@ class NotificationAgent:
         </body>
         </html>
         """
-        return html_content
-    
-    def _create_confirmation_email_text(self, ticket_data: Dict, ticket_number: str) -> str:
-        """
-        Create plain text version of the confirmation email.
-        """
-        classified_data = ticket_data.get('classified_data', {})
-        extracted_metadata = ticket_data.get('extracted_metadata', {})
-        resolution_note = ticket_data.get('resolution_note', 'No resolution note available')
-        
-        # Get classification labels
-        issue_type = classified_data.get('ISSUETYPE', {}).get('Label', 'N/A')
-        priority = classified_data.get('PRIORITY', {}).get('Label', 'N/A')
-        ticket_type = classified_data.get('TICKETTYPE', {}).get('Label', 'N/A')
-        
-        text_content = f"""
+
+_CONFIRMATION_TEXT_TEMPLATE = """
 TICKET CONFIRMATION - #{ticket_number}
 
 Thank you for submitting your support ticket!
@@ -197,10 +127,10 @@ Your ticket has been received and automatically classified by our AI system.
 
 TICKET INFORMATION:
 - Ticket Number: #{ticket_number}
-- Title: {ticket_data.get('title', 'N/A')}
-- Submitted By: {ticket_data.get('name', 'N/A')}
-- Date Created: {ticket_data.get('date', 'N/A')} {ticket_data.get('time', 'N/A')}
-- Due Date: {ticket_data.get('due_date', 'N/A')}
+- Title: {title}
+- Submitted By: {name}
+- Date Created: {date} {time}
+- Due Date: {due_date}
 - Priority: {priority}
 - Issue Type: {issue_type}
 - Ticket Type: {ticket_type}
@@ -216,11 +146,409 @@ WHAT HAPPENS NEXT?
 5. You can reference this ticket using number #{ticket_number}
 
 Need immediate assistance? Contact our support team:
-Email: {os.getenv('SUPPORT_EMAIL', 'rohankul2017@gmail.com')}
-Phone: {os.getenv('SUPPORT_PHONE', '9723100860')}
+Email: {support_email}
+Phone: {support_phone}
 
 ---
 This is an automated message from TeamLogic Support System.
-Please do not reply to this email. For assistance, contact our support team.
+Please do not reply to this email. For assistance, contact our support team.""".strip()
+
+
+class NotificationAgent:
+    """
+    Handles email notifications for ticket confirmations.
+    """
+    
+    def __init__(self):
+        """
+        Initialize the notification agent with SMTP configuration.
+        """
+        # SMTP Configuration from environment variables
+        self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
+        self.smtp_port = int(os.getenv('SMTP_PORT', '587'))
+        self.smtp_username = os.getenv('SMTP_USERNAME', os.getenv('EMAIL_ACCOUNT', 'rohankul2017@gmail.com'))
+        self.smtp_password = os.getenv('SMTP_PASSWORD', os.getenv('SUPPORT_EMAIL_PASSWORD'))
+        self.from_email = os.getenv('FROM_EMAIL', self.smtp_username)
+        self.from_name = os.getenv('FROM_NAME', 'TeamLogic Support')
+        self.from_header = f"{self.from_name} <{self.from_email}>"
+        self.support_email = os.getenv('SUPPORT_EMAIL', 'rohankul2017@gmail.com')
+        self.support_phone = os.getenv('SUPPORT_PHONE', '9723100860')
+        
+        # Pool of (authenticated SMTP session, last-used time, messages sent) entries reused across sends; the size also caps how many
+        # connections are open at once (providers such as Gmail limit concurrent sessions)
+        self.smtp_pool_size = max(1, int(os.getenv('SMTP_POOL_SIZE', '4')))
+        self._pool = queue.Queue(maxsize=self.smtp_pool_size)
+        self._pool_slots = threading.BoundedSemaphore(self.smtp_pool_size)
+        # Drains the pool when the agent is collected or at interpreter exit, without keeping the agent alive
+        weakref.finalize(self, NotificationAgent._drain_pool, self._pool)
+        
+        # Validate configuration
+        if not self.smtp_password:
+            logger.warning("SMTP password not configured. Email notifications will be disabled.")
+            self.enabled = False
+        else:
+            self.enabled = True
+            logger.info("Notification agent initialized successfully")
+    
+    def send_ticket_confirmation(self, user_email: str, ticket_data: Dict, ticket_number: str) -> bool:
+        """
+        Send a ticket confirmation email to the user.
+        
+        Args:
+            user_email (str): User's email address
+            ticket_data (dict): Ticket information
+            ticket_number (str): Generated ticket number
+            
+        Returns:
+            bool: True if email sent successfully, False otherwise
+        """
+        if not self.enabled:
+            logger.warning("Email notifications are disabled due to missing SMTP configuration")
+            return False
+            
+        if not user_email or not user_email.strip():
+            logger.warning("No user email provided for notification")
+            return False
+        if not is_valid_email(user_email):
+            logger.warning("Invalid email address for notification: %s", user_email)
+            return False
+            
+        import smtplib
+        
+        try:
+            msg = self._build_confirmation_message(user_email, ticket_data, ticket_number)
+            
+            # Send email
+            self._send_message(msg)
+                
+            logger.info("Confirmation email sent successfully to %s for ticket #%s", user_email, ticket_number)
+            return True
+            
+        except (smtplib.SMTPException, OSError, ValueError) as e:
+            logger.error("Failed to send confirmation email to %s: %s", user_email, e)
+            return False
+    
+    def send_ticket_confirmations(self, confirmations: List[Tuple[str, Dict, str]]) -> List[bool]:
+        """
+        Send several ticket confirmation emails one after another.
+        Consecutive sends reuse the same pooled session, so the batch pays for at most one
+        SMTP handshake (plus one per SMTP_MAX_MESSAGES_PER_CONNECTION messages).
+        
+        Args:
+            confirmations (list): (user_email, ticket_data, ticket_number) tuples
+            
+        Returns:
+            list: True/False per confirmation, in input order
+        """
+        return [
+            self.send_ticket_confirmation(user_email, ticket_data, ticket_number)
+            for user_email, ticket_data, ticket_number in confirmations
+        ]
+    
+    def send_bulk(self, recipients: List[str], subject: str, html_content: str, text_content: str) -> List[bool]:
+        """
+        Send the same email to several recipients.
+        The message is built and its parts encoded once; only the To header changes per recipient.
+        
+        Args:
+            recipients (list): Recipient email addresses
+            subject (str): Email subject
+            html_content (str): HTML body
+            text_content (str): Plain text body
+            
+        Returns:
+            list: True/False per recipient, in input order
+        """
+        if not self.enabled:
+            logger.warning("Email notifications are disabled due to missing SMTP configuration")
+            return [False] * len(recipients)
+        
+        import smtplib
+        
+        msg = self._build_message('', subject, html_content, text_content)
+        results = []
+        for recipient in recipients:
+            if not is_valid_email(recipient):
+                logger.warning("Invalid email address for notification: %s", recipient)
+                results.append(False)
+                continue
+            
+            del msg['To']
+            msg['To'] = recipient
+            try:
+                self._send_message(msg)
+            except (smtplib.SMTPException, OSError, ValueError) as e:
+                logger.error("Failed to send email to %s: %s", recipient, e)
+                results.append(False)
+                continue
+            logger.info("Email '%s' sent successfully to %s", subject, recipient)
+            results.append(True)
+        return results
+    
+    async def send_ticket_confirmations_async(self, confirmations: List[Tuple[str, Dict, str]],
+                                              concurrency: Optional[int] = None) -> List[bool]:
+        """
+        Send several ticket confirmation emails concurrently from an asyncio event loop.
+        Up to `concurrency` workers each hold one authenticated aiosmtplib session and
+        drain a shared job queue. Requires the optional aiosmtplib package; the
+        synchronous send_ticket_confirmation is unaffected.
+        
+        Args:
+            confirmations (list): (user_email, ticket_data, ticket_number) tuples
+            concurrency (int, optional): Number of parallel SMTP sessions, defaults to the
+                SMTP pool size
+            
+        Returns:
+            list: True/False per confirmation, in input order
+        """
+        results = [False] * len(confirmations)
+        if not self.enabled:
+            logger.warning("Email notifications are disabled due to missing SMTP configuration")
+            return results
+        if aiosmtplib is None:
+            logger.error("aiosmtplib is not installed; asynchronous email sending is unavailable")
+            return results
+        
+        jobs = []
+        for index, (user_email, ticket_data, ticket_number) in enumerate(confirmations):
+            if not user_email or not user_email.strip():
+                logger.warning("No user email provided for notification")
+                continue
+            if not is_valid_email(user_email):
+                logger.warning("Invalid email address for notification: %s", user_email)
+                continue
+            msg = self._build_confirmation_message(user_email, ticket_data, ticket_number)
+            jobs.append((index, user_email, ticket_number, msg, False))
+        if not jobs:
+            return results
+        
+        job_queue = asyncio.Queue()
+        for job in jobs:
+            job_queue.put_nowait(job)
+        workers = min(concurrency or self.smtp_pool_size, len(jobs))
+        await asyncio.gather(*[self._confirmation_worker_async(job_queue, results) for _ in range(workers)])
+        
+        # Jobs still queued here were never attempted because no worker could open a session
+        while not job_queue.empty():
+            _, user_email, ticket_number, _, _ = job_queue.get_nowait()
+            logger.error("Failed to send confirmation email to %s for ticket #%s: no SMTP session available",
+                         user_email, ticket_number)
+        return results
+    
+    async def _confirmation_worker_async(self, job_queue: 'asyncio.Queue', results: List[bool]):
+        """
+        Send queued confirmations over one aiosmtplib session until the queue is empty.
+        If the server drops the session, the job goes back on the queue (once, like the
+        synchronous retry) and the worker reconnects. If a session cannot be opened the
+        worker exits and leaves the jobs to the others.
+        """
+        while not job_queue.empty():
+            try:
+                async with aiosmtplib.SMTP(hostname=self.smtp_server, port=self.smtp_port,
+                                           start_tls=True, timeout=30) as client:
+                    await client.login(self.smtp_username, self.smtp_password)
+                    while True:
+                        try:
+                            index, user_email, ticket_number, msg, retried = job_queue.get_nowait()
+                        except asyncio.QueueEmpty:
+                            return
+                        try:
+                            results[index] = await self._send_confirmation_async(client, msg, user_email, ticket_number)
+                        except aiosmtplib.SMTPServerDisconnected as e:
+                            if retried:
+                                logger.error("Failed to send confirmation email to %s: %s", user_email, e)
+                            else:
+                                job_queue.put_nowait((index, user_email, ticket_number, msg, True))
+                            break
+            except (aiosmtplib.SMTPException, OSError) as e:
+                logger.error("Failed to open SMTP session for confirmation emails: %s", e)
+                return
+    
+    async def _send_confirmation_async(self, client, msg: 'EmailMessage', user_email: str, ticket_number: str) -> bool:
+        try:
+            await client.send_message(msg)
+        except aiosmtplib.SMTPServerDisconnected:
+            # The session is gone; the worker reconnects and retries the job
+            raise
+        except (aiosmtplib.SMTPException, OSError) as e:
+            logger.error("Failed to send confirmation email to %s: %s", user_email, e)
+            return False
+        logger.info("Confirmation email sent successfully to %s for ticket #%s", user_email, ticket_number)
+        return True
+    
+    def _build_confirmation_message(self, user_email: str, ticket_data: Dict, ticket_number: str) -> 'EmailMessage':
+        """
+        Build the confirmation email message for a ticket.
+        """
+        # Create email content
+        context = self._build_render_context(ticket_data, ticket_number)
+        html_content = self._create_confirmation_email_html(context)
+        text_content = self._create_confirmation_email_text(context)
+        
+        return self._build_message(user_email, f"Ticket Confirmation - #{ticket_number}", html_content, text_content)
+    
+    def _build_message(self, recipient: str, subject: str, html_content: str, text_content: str) -> 'EmailMessage':
+        """
+        Build a multipart email with plain text and HTML alternatives.
+        """
+        from email.message import EmailMessage
+        
+        msg = EmailMessage()
+        msg['Subject'] = subject
+        msg['From'] = self.from_header
+        msg['To'] = recipient
+        
+        # Plain text body with an HTML alternative
+        msg.set_content(text_content)
+        msg.add_alternative(html_content, subtype='html')
+        return msg
+    
+    def _open_connection(self) -> 'smtplib.SMTP':
+        """
+        Open a new SMTP session and authenticate it.
+        """
+        import smtplib
+        
+        # Ensure smtp_password is not None (should be guaranteed by enabled check)
+        if self.smtp_password is None:
+            raise ValueError("SMTP password is not configured")
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30)
+        try:
+            server.ehlo()
+            server.starttls()
+            server.ehlo()
+            server.login(self.smtp_username, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    @staticmethod
+    def _close_connection(server: 'smtplib.SMTP'):
+        import smtplib
+        
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+    
+    def _get_conn(self) -> Tuple['smtplib.SMTP', int]:
+        """
+        Take an idle session from the pool, or open a new one if none is available.
+        
+        Returns:
+            tuple: (session, number of messages already sent over it)
+        """
+        import smtplib
+        
+        try:
+            server, last_used, messages_sent = self._pool.get_nowait()
+        except queue.Empty:
+            return self._open_connection(), 0
+        
+        # A recently used session is almost certainly still open; only sessions idle long
+        # enough for the server to have dropped them pay for a NOOP round-trip
+        if time.monotonic() - last_used < SMTP_IDLE_CHECK_SECONDS:
+            return server, messages_sent
+        try:
+            server.noop()
+            return server, messages_sent
+        except (smtplib.SMTPException, OSError):
+            self._close_connection(server)
+            return self._open_connection(), 0
+    
+    def _return_conn(self, server: 'smtplib.SMTP', messages_sent: int):
+        """
+        Put a healthy session back in the pool for the next send, or retire it once it
+        has carried SMTP_MAX_MESSAGES_PER_CONNECTION messages.
+        """
+        if messages_sent >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+            self._close_connection(server)
+            return
+        try:
+            self._pool.put_nowait((server, time.monotonic(), messages_sent))
+        except queue.Full:
+            self._close_connection(server)
+    
+    def _send_message(self, msg: 'EmailMessage'):
+        """
+        Send a message over a pooled SMTP session.
+        A session that disconnects mid-send is replaced and the send retried once;
+        a session that fails in any other way is discarded and the error re-raised.
+        """
+        import smtplib
+        
+        with self._pool_slots:
+            for attempt in range(2):
+                server, messages_sent = self._get_conn()
+                try:
+                    server.send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    self._close_connection(server)
+                    if attempt:
+                        raise
+                    continue
+                except Exception:
+                    self._close_connection(server)
+                    raise
+                self._return_conn(server, messages_sent + 1)
+                return
+    
+    def close(self):
+        """
+        Close every idle pooled SMTP session.
+        """
+        self._drain_pool(self._pool)
+    
+    @staticmethod
+    def _drain_pool(pool: queue.Queue):
+        while True:
+            try:
+                server, _, _ = pool.get_nowait()
+            except queue.Empty:
+                break
+            NotificationAgent._close_connection(server)
+    
+    def _build_render_context(self, ticket_data: Dict, ticket_number: str) -> Dict:
+        """
+        Collect the values shared by the HTML and plain-text confirmation emails.
+        """
+        classified_data = ticket_data.get('classified_data', {})
+        
+        return {
+            'ticket_number': ticket_number,
+            'title': ticket_data.get('title', 'N/A'),
+            'name': ticket_data.get('name', 'N/A'),
+            'date': ticket_data.get('date', 'N/A'),
+            'time': ticket_data.get('time', 'N/A'),
+            'due_date': ticket_data.get('due_date', 'N/A'),
+            'priority': classified_data.get('PRIORITY', {}).get('Label', 'N/A'),
+            'issue_type': classified_data.get('ISSUETYPE', {}).get('Label', 'N/A'),
+            'ticket_type': classified_data.get('TICKETTYPE', {}).get('Label', 'N/A'),
+            'resolution_note': ticket_data.get('resolution_note', 'No resolution note available'),
+            'support_email': self.support_email,
+            'support_phone': self.support_phone
+        }
+    
+    def _create_confirmation_email_html(self, context: Dict) -> str:
+        """
+        Create HTML version of the confirmation email.
+        Every interpolated value is HTML-escaped, since title, name and the resolution
+        note come from user input or LLM output.
+        """
+        html_context = {key: escape(str(value)) for key, value in context.items()}
+        
+        # Format resolution note for HTML (escaped first, so only our <br> tags are markup);
+        # single-line notes such as the fallback text are used as they are
+        resolution_html = html_context['resolution_note']
+        if '\n' in resolution_html:
+            resolution_html = resolution_html.replace('\n', '<br>')
+        html_context['resolution_html'] = resolution_html
+        
+        return _CONFIRMATION_HTML_TEMPLATE.format_map(html_context)
+    
+    def _create_confirmation_email_text(self, context: Dict) -> str:
+        """
+        Create plain text version of the confirmation email.
         """
-        return text_content.strip()
+        return _CONFIRMATION_TEXT_TEMPLATE.format_map(context)
@@ -0,0 +1,16 @@
+"""
+Cache Package
+Contains caches used to skip repeated LLM work.
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.cache.semantic_cache import SemanticTicketCache
+from src.cache.llm_cache import LLMResponseCache
+
+__all__ = [
+    'SemanticTicketCache',
+    'LLMResponseCache'
+]
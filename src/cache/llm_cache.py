@@ -0,0 +1,118 @@
+"""
+Persistent LLM response cache for TeamLogic-AutoTask application.
+Stores parsed Cortex responses in a local SQLite file keyed on a hash of the
+model and prompt, so an identical request is answered without another LLM call.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Optional
+
+# Expired and surplus rows are deleted at startup and once every this many writes
+PURGE_EVERY_WRITES = 100
+
+
+class LLMResponseCache:
+    """
+    Exact-match cache of LLM responses backed by SQLite.
+    Keys are SHA-256 digests of the model name and the full prompt text, so a hit
+    is only possible for a byte-identical request.
+    """
+
+    def __init__(self, db_path: str = 'data/llm_cache.db', ttl_seconds: int = 24 * 60 * 60,
+                 max_entries: int = 5000):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path (str): Path to the SQLite file
+            ttl_seconds (int): Seconds a cached response stays valid
+            max_entries (int): Rows kept after a purge; the oldest are dropped first
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_created_at ON llm_cache (created_at)")
+            self._purge(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A short-lived connection per operation keeps the cache safe to use from worker threads
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _purge(self, conn: sqlite3.Connection):
+        """
+        Delete expired rows, then the oldest rows beyond max_entries.
+        """
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (int(time.time()) - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    @staticmethod
+    def make_key(model: str, prompt: str) -> str:
+        """
+        Build the cache key for a model/prompt pair.
+        """
+        return hashlib.sha256(f"{model}\x00{prompt}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Key from make_key()
+
+        Returns:
+            The cached response, or None on a miss or an expired entry
+        """
+        try:
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute(
+                    "SELECT value FROM llm_cache WHERE key = ? AND created_at >= ?",
+                    (key, int(time.time()) - self.ttl_seconds)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Warning: LLM cache lookup failed: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any):
+        """
+        Store a response; it must be JSON serialisable.
+
+        Args:
+            key (str): Key from make_key()
+            value: Response to cache
+        """
+        with self._writes_lock:
+            self._writes += 1
+            purge = self._writes % PURGE_EVERY_WRITES == 0
+
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), int(time.time()))
+                )
+                if purge:
+                    self._purge(conn)
+        except sqlite3.Error as e:
+            print(f"Warning: LLM cache write failed: {e}")
@@ -0,0 +1,147 @@
+"""
+Semantic result cache for TeamLogic-AutoTask application.
+Lets the intake pipeline reuse the LLM results of a recently processed ticket
+when a new ticket is identical or a near-duplicate of it.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+
+def tfidf_similarity(text: str, candidates: List[str]) -> List[float]:
+    """
+    Cosine similarity of one text against each candidate over a TF-IDF space fitted on all of them.
+    Unlike TicketProcessor.get_similarity_score there is no max_df cut-off, which would drop
+    exactly the terms shared by a handful of near-duplicate texts.
+
+    Args:
+        text (str): Text to score
+        candidates (list): Texts to compare against
+
+    Returns:
+        list: One score per candidate
+    """
+    try:
+        vectors = TfidfVectorizer(ngram_range=(1, 2)).fit_transform([text] + candidates)
+    except ValueError:
+        # Empty vocabulary (e.g. only punctuation)
+        return [0.0] * len(candidates)
+    return cosine_similarity(vectors[0:1], vectors[1:])[0].tolist()
+
+
+class SemanticTicketCache:
+    """
+    Two-layer cache of intake pipeline results keyed on ticket text.
+
+    Layer 1 is an exact match on a SHA-256 of the normalised title and description.
+    Layer 2 compares the new ticket against the cached ticket texts with a
+    similarity function (TF-IDF cosine by default) and accepts the best match
+    at or above the threshold.
+    """
+
+    def __init__(self, similarity_fn: Optional[Callable[[str, List[str]], List[float]]] = tfidf_similarity,
+                 threshold: float = 0.95, ttl_seconds: int = 24 * 60 * 60, max_entries: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            similarity_fn (callable, optional): Function scoring one text against a list of texts;
+                pass None to keep only the exact-match layer
+            threshold (float): Minimum similarity score for a near-duplicate hit
+            ttl_seconds (int): Seconds an entry stays valid
+            max_entries (int): Maximum number of cached tickets (least recently used are evicted)
+        """
+        self.similarity_fn = similarity_fn
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(title: str, description: str) -> str:
+        return ' '.join(f"{title} {description}".lower().split())
+
+    @staticmethod
+    def _make_key(text: str, namespace: str) -> str:
+        return hashlib.sha256(f"{namespace}\x00{text}".encode('utf-8')).hexdigest()
+
+    def _evict_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if entry['expires_at'] <= now]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, title: str, description: str, namespace: str = '') -> Optional[Dict]:
+        """
+        Find cached results for an identical or near-identical ticket.
+
+        Args:
+            title (str): Ticket title
+            description (str): Ticket description
+            namespace (str): Extra key component (e.g. the models used), entries only
+                match within the same namespace
+
+        Returns:
+            dict: A copy of the cached results, or None on a miss
+        """
+        text = self._normalize(title, description)
+        key = self._make_key(text, namespace)
+        now = time.time()
+
+        with self._lock:
+            self._evict_expired(now)
+
+            entry = self._entries.get(key)
+            if entry is None and self.similarity_fn and text:
+                candidates = [(k, e) for k, e in self._entries.items() if e['namespace'] == namespace]
+                if candidates:
+                    scores = self.similarity_fn(text, [e['text'] for _, e in candidates])
+                    if len(scores) == len(candidates):
+                        best = max(range(len(scores)), key=lambda i: scores[i])
+                        if scores[best] >= self.threshold:
+                            key, entry = candidates[best]
+
+            if entry is None:
+                return None
+
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry['value'])
+
+    def store(self, title: str, description: str, value: Dict, namespace: str = ''):
+        """
+        Cache the pipeline results for a ticket.
+
+        Args:
+            title (str): Ticket title
+            description (str): Ticket description
+            value (dict): Results to cache
+            namespace (str): Extra key component, see lookup()
+        """
+        text = self._normalize(title, description)
+        key = self._make_key(text, namespace)
+        now = time.time()
+
+        with self._lock:
+            self._entries[key] = {
+                'text': text,
+                'namespace': namespace,
+                'value': copy.deepcopy(value),
+                'expires_at': now + self.ttl_seconds
+            }
+            self._entries.move_to_end(key)
+            self._evict_expired(now)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop every cached entry (e.g. after the reference data changes).
+        """
+        with self._lock:
+            self._entries.clear()
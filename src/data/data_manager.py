@@ -107,23 +107,29 @@ class DataManager:
         for entry in kb_data:
             t = entry.get('new_ticket', {})
             c = t.get('classified_data', {})
+            # Read each field once; several of them feed more than one output key
+            get = t.get
+            title = get('title', '')
+            date_str = get('date', '')
+            time_str = get('time', '')
+            created_at = f"{date_str}T{time_str}"
             ticket = {
-                "id": t.get('ticket_number', t.get('title', '') + t.get('date', '') + t.get('time', '')),
-                "ticket_number": t.get('ticket_number', 'N/A'),
-                "title": t.get('title', ''),
-                "description": t.get('description', ''),
-                "created_at": f"{t.get('date', '')}T{t.get('time', '')}",
+                "id": get('ticket_number', title + date_str + time_str),
+                "ticket_number": get('ticket_number', 'N/A'),
+                "title": title,
+                "description": get('description', ''),
+                "created_at": created_at,
                 "status": c.get('STATUS', {}).get('Label', 'Open'),
                 "priority": c.get('PRIORITY', {}).get('Label', 'Medium'),
                 "category": c.get('TICKETCATEGORY', {}).get('Label', 'General'),
-                "requester_name": t.get('name', ''),
-                "requester_email": t.get('user_email', ''),
+                "requester_name": get('name', ''),
+                "requester_email": get('user_email', ''),
                 "requester_phone": "",  # Add if available
                 "company_id": "",       # Add if available
                 "device_model": "",     # Add if available
                 "os_version": "",       # Add if available
                 "error_message": "",    # Add if available
-                "updated_at": t.get('updated_at', f"{t.get('date', '')}T{t.get('time', '')}")
+                "updated_at": get('updated_at', created_at)
             }
             tickets.append(ticket)
         return {"tickets": tickets}
@@ -163,7 +169,7 @@ class DataManager:
                 created_time = datetime.fromisoformat(ticket["created_at"])
                 if created_time >= cutoff_time:
                     recent.append(ticket)
-            except:
+            except (KeyError, TypeError, ValueError):
                 continue
 
         return sorted(recent, key=lambda x: x["created_at"], reverse=True)
@@ -179,7 +185,7 @@ class DataManager:
                 created_time = datetime.fromisoformat(ticket["created_at"])
                 if created_time.date() == today:
                     today_tickets.append(ticket)
-            except:
+            except (KeyError, TypeError, ValueError):
                 continue
 
         return sorted(today_tickets, key=lambda x: x["created_at"], reverse=True)
@@ -217,7 +223,7 @@ class DataManager:
                 created_time = datetime.fromisoformat(ticket["created_at"])
                 if created_time >= cutoff_24h:
                     stats["last_24h"] += 1
-            except:
+            except (KeyError, TypeError, ValueError):
                 continue
 
         return stats
@@ -257,7 +263,7 @@ class DataManager:
                     created_time = datetime.fromisoformat(ticket["created_at"])
                     if start_time <= created_time <= end_time:
                         filtered_tickets.append(ticket)
-                except:
+                except (KeyError, TypeError, ValueError):
                     continue
             return sorted(filtered_tickets, key=lambda x: x["created_at"], reverse=True)
         elif duration == "Last 3 days":
@@ -277,7 +283,7 @@ class DataManager:
                 created_time = datetime.fromisoformat(ticket["created_at"])
                 if created_time >= cutoff_time:
                     filtered_tickets.append(ticket)
-            except:
+            except (KeyError, TypeError, ValueError):
                 continue
 
         return sorted(filtered_tickets, key=lambda x: x["created_at"], reverse=True)
@@ -296,7 +302,7 @@ class DataManager:
                 created_time = datetime.fromisoformat(ticket["created_at"])
                 if start_datetime <= created_time <= end_datetime:
                     filtered_tickets.append(ticket)
-            except:
+            except (KeyError, TypeError, ValueError):
                 continue
 
         return sorted(filtered_tickets, key=lambda x: x["created_at"], reverse=True)
@@ -311,7 +317,7 @@ class DataManager:
                 created_time = datetime.fromisoformat(ticket["created_at"])
                 if created_time.date() == selected_date:
                     filtered_tickets.append(ticket)
-            except:
+            except (KeyError, TypeError, ValueError):
                 continue
 
         return sorted(filtered_tickets, key=lambda x: x["created_at"], reverse=True)
\ No newline at end of file
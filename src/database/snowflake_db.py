@@ -3,12 +3,51 @@ Database connection and operations module for TeamLogic-AutoTask application.
 Handles Snowflake connections and database queries.
 """
 
+import logging
 import snowflake.connector
 import pandas as pd
 import re
 import json
+import time
 from typing import List, Dict, Optional
 
+try:
+    # Optional faster parser for LLM responses; orjson.JSONDecodeError subclasses
+    # json.JSONDecodeError, so existing error handling is unchanged
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# Resolutions matching any of these are generic hand-offs rather than real fixes
+GENERIC_RESOLUTION_PATTERNS = [
+    'please try', 'contact support', 'escalate to', 'call helpdesk',
+    'generic solution', 'standard procedure', 'follow up with'
+]
+
+# A resolution must mention at least one of these to count as technical content
+TECHNICAL_RESOLUTION_INDICATORS = [
+    'restart', 'configure', 'install', 'update', 'check', 'verify',
+    'run', 'execute', 'open', 'close', 'delete', 'create', 'modify',
+    'setting', 'option', 'parameter', 'file', 'folder', 'registry',
+    'service', 'process', 'application', 'system'
+]
+
+_GENERIC_RESOLUTION_RE = re.compile('|'.join(map(re.escape, GENERIC_RESOLUTION_PATTERNS)), re.IGNORECASE)
+_TECHNICAL_RESOLUTION_RE = re.compile('|'.join(map(re.escape, TECHNICAL_RESOLUTION_INDICATORS)), re.IGNORECASE)
+
+# Patterns used to pull a JSON object out of a Cortex response and tidy it before json.loads
+_JSON_FENCED_BLOCK_RE = re.compile(r'```json\s*(\{[\s\S]*?\})\s*```')
+_FENCED_BLOCK_RE = re.compile(r'```\s*(\{[\s\S]*?\})\s*```')
+_JSON_BLOCK_RE = re.compile(r'(\{[\s\S]*\})')
+_LINE_COMMENT_RE = re.compile(r'//.*?(?=\n|$)')
+_BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+
+# How long fetch_reference_tickets reuses its last result before querying again
+REFERENCE_TICKETS_TTL_SECONDS = 15 * 60
+
 
 class SnowflakeConnection:
     """
@@ -24,6 +63,7 @@ class SnowflakeConnection:
         self.schema = schema
         self.role = role
         self.conn = None
+        self._reference_tickets_cache = None  # (fetched_at, DataFrame)
         self._connect_to_snowflake()
 
     def _connect_to_snowflake(self):
@@ -61,7 +101,7 @@ class SnowflakeConnection:
             with self.conn.cursor(snowflake.connector.DictCursor) as cur:
                 cur.execute(query, params)
                 return cur.fetchall()
-        except Exception as e:
+        except snowflake.connector.errors.Error as e:
             print(f"Error executing Snowflake query: {e}")
             return []
 
@@ -81,15 +121,11 @@ class SnowflakeConnection:
             print("Cannot call LLM: Not connected to Snowflake.")
             return None
 
-        import re
-        import json
-
-        escaped_prompt_text = prompt_text.replace("'", "''")
-        query = f"""
-        SELECT SNOWFLAKE.CORTEX.COMPLETE('{model}', '{escaped_prompt_text}') AS LLM_RESPONSE;
-        """
-        print(f"Calling Snowflake Cortex LLM with model: {model}...")
-        results = self.execute_query(query)
+        # Model and prompt are passed as parameters so the connector escapes them,
+        # instead of quoting them by hand into the SQL text
+        query = "SELECT SNOWFLAKE.CORTEX.COMPLETE(%s, %s) AS LLM_RESPONSE"
+        logger.debug("Calling Snowflake Cortex LLM with model: %s", model)
+        results = self.execute_query(query, (model, prompt_text))
 
         if results and results[0]['LLM_RESPONSE']:
             response_str = results[0]['LLM_RESPONSE']
@@ -100,20 +136,20 @@ class SnowflakeConnection:
 
             try:
                 # Extract JSON block from LLM response
-                match = re.search(r'```json\s*(\{[\s\S]*?\})\s*```', response_str)
+                match = _JSON_FENCED_BLOCK_RE.search(response_str)
                 if not match:
-                    match = re.search(r'```\s*(\{[\s\S]*?\})\s*```', response_str)
+                    match = _FENCED_BLOCK_RE.search(response_str)
                 if match:
                     response_str = match.group(1)
                 else:
                     # Try to find the first { ... } block
-                    match = re.search(r'(\{[\s\S]*\})', response_str)
+                    match = _JSON_BLOCK_RE.search(response_str)
                     if match:
                         response_str = match.group(1)
 
                 # Clean JSON by removing comments
                 response_str = self._clean_json_response(response_str)
-                return json.loads(response_str)
+                return _json_loads(response_str)
             except json.JSONDecodeError as e:
                 print(f"Error decoding LLM response JSON: {e}")
                 print(f"Raw LLM response: {results[0]['LLM_RESPONSE']}")
@@ -131,13 +167,13 @@ class SnowflakeConnection:
             str: Cleaned JSON string
         """
         # Remove single-line comments (// comment)
-        json_str = re.sub(r'//.*?(?=\n|$)', '', json_str)
+        json_str = _LINE_COMMENT_RE.sub('', json_str)
 
         # Remove multi-line comments (/* comment */)
-        json_str = re.sub(r'/\*.*?\*/', '', json_str, flags=re.DOTALL)
+        json_str = _BLOCK_COMMENT_RE.sub('', json_str)
 
         # Remove trailing commas before closing braces/brackets
-        json_str = re.sub(r',\s*([}\]])', r'\1', json_str)
+        json_str = _TRAILING_COMMA_RE.sub(r'\1', json_str)
 
         return json_str.strip()
 
@@ -170,16 +206,22 @@ class SnowflakeConnection:
         {where_clause}
         LIMIT 50;
         """
-        print(f"Searching for similar tickets...")
+        logger.debug("Searching for similar tickets with %d conditions", len(search_conditions))
         return self.execute_query(query, tuple(params))
 
     def fetch_reference_tickets(self) -> pd.DataFrame:
         """
         Fetches actual historical tickets with real, detailed resolutions.
+        The filtered result is reused for REFERENCE_TICKETS_TTL_SECONDS, since the
+        historical data changes slowly.
 
         Returns:
             pd.DataFrame: DataFrame containing historical tickets with resolutions
         """
+        cached = self._reference_tickets_cache
+        if cached is not None and time.monotonic() - cached[0] < REFERENCE_TICKETS_TTL_SECONDS:
+            return cached[1].copy()
+
         query = """
             SELECT TITLE, DESCRIPTION, ISSUETYPE, SUBISSUETYPE, PRIORITY, RESOLUTION
             FROM TEST_DB.PUBLIC.COMPANY_4130_DATA
@@ -205,63 +247,23 @@ class SnowflakeConnection:
             df = pd.DataFrame(results)
             print(f"Fetched {len(df)} historical tickets")
 
-            # Additional filtering for actual technical resolutions
-            df = df[df['RESOLUTION'].str.len() > 50]
-
-            # Filter out generic responses
-            generic_patterns = [
-                'please try', 'contact support', 'escalate to', 'call helpdesk',
-                'generic solution', 'standard procedure', 'follow up with'
-            ]
-
-            for pattern in generic_patterns:
-                df = df[~df['RESOLUTION'].str.contains(pattern, case=False, na=False)]
-
-            # Keep only resolutions with actual technical content
-            technical_indicators = [
-                'restart', 'configure', 'install', 'update', 'check', 'verify',
-                'run', 'execute', 'open', 'close', 'delete', 'create', 'modify',
-                'setting', 'option', 'parameter', 'file', 'folder', 'registry',
-                'service', 'process', 'application', 'system'
-            ]
-
-            technical_mask = df['RESOLUTION'].str.contains('|'.join(technical_indicators), case=False, na=False)
-            df = df[technical_mask]
+            # Filter out generic responses, then keep only resolutions with actual technical content
+            df = df[~df['RESOLUTION'].str.contains(_GENERIC_RESOLUTION_RE, na=False)]
+            df = df[df['RESOLUTION'].str.contains(_TECHNICAL_RESOLUTION_RE, na=False)]
 
             print(f"After filtering for actual technical resolutions: {len(df)} tickets available")
 
-            return df
+            self._reference_tickets_cache = (time.monotonic(), df)
+            return df.copy()
         else:
             print("No historical tickets found")
             return pd.DataFrame()
 
-    def get_all_tickets(self, limit=50, offset=0, status_filter=None, priority_filter=None):
-        columns = [
-            "TICKETNUMBER", "TITLE", "DESCRIPTION", "DUEDATETIME", "PRIORITY", "STATUS",
-            "TECHNICIANEMAIL", "USEREMAIL", "USERID"
-        ]
-        query = f"SELECT {', '.join(columns)} FROM TEST_DB.PUBLIC.TICKETS"
-        filters = []
-        params = []
-        if status_filter:
-            filters.append("STATUS = %s")
-            params.append(status_filter)
-        if priority_filter:
-            filters.append("PRIORITY = %s")
-            params.append(priority_filter)
-        if filters:
-            query += " WHERE " + " AND ".join(filters)
-        query += f" ORDER BY TICKETNUMBER DESC LIMIT {int(limit)} OFFSET {int(offset)}"
-        print("DEBUG: Executing query:", query)
-        print("DEBUG: With params:", params)
-        results = self.execute_query(query, tuple(params) if params else None)
-        print("DEBUG: Results:", results)
-        return results
-
-    def get_ticket_by_number(self, ticket_number):
-        query = "SELECT * FROM TEST_DB.PUBLIC.TICKETS WHERE TICKETNUMBER = %s"
-        result = self.execute_query(query, (ticket_number,))
-        return result[0] if result else None
+    def invalidate_reference_tickets_cache(self):
+        """
+        Forces the next fetch_reference_tickets call to query Snowflake again.
+        """
+        self._reference_tickets_cache = None
 
     def get_technician_by_ticket_number(self, ticket_number):
         # Get technician_id from ticket
@@ -324,13 +326,17 @@ class SnowflakeConnection:
                 FROM TEST_DB.PUBLIC.TICKETS
                 {where_clause}
                 ORDER BY TICKETNUMBER DESC
-                LIMIT {limit} OFFSET {offset}
+                LIMIT %s OFFSET %s
             """
+            params.extend([int(limit), int(offset)])
 
-            return self.execute_query(query, tuple(params) if params else None)
+            logger.debug("Executing query: %s with params: %s", query, params)
+            results = self.execute_query(query, tuple(params))
+            logger.debug("Fetched %d tickets", len(results))
+            return results
 
         except Exception as e:
-            print(f"Error getting all tickets: {e}")
+            logger.error("Error getting all tickets: %s", e)
             return []
 
     def get_ticket_by_number(self, ticket_number: str) -> Optional[Dict]:
@@ -367,8 +373,64 @@ class SnowflakeConnection:
             return results[0] if results else None
 
         except Exception as e:
-            print(f"Error getting ticket by number: {e}")
+            logger.error("Error getting ticket by number: %s", e)
+            return None
+
+    def insert_ticket(self, ticket_number: str, title: str, description: str, due_date: str,
+                      priority: str, status: str, technician_email: str, user_email: str,
+                      user_id: str) -> Optional[bool]:
+        """
+        Insert a ticket into the TICKETS table unless the ticket number is already taken.
+
+        The existence check and the insert run as one INSERT ... SELECT ... WHERE NOT EXISTS
+        statement to save a round-trip. Snowflake does not enforce UNIQUE constraints and
+        concurrent statements do not block each other, so this only catches numbers that
+        are already committed; unique numbers still come from the intake agent's sequence.
+
+        Args:
+            ticket_number (str): Unique ticket number
+            title (str): Ticket title
+            description (str): Ticket description
+            due_date (str): Due date for the ticket
+            priority (str): Priority label
+            status (str): Status label
+            technician_email (str): Assigned technician's email
+            user_email (str): Requester's email
+            user_id (str): Requester's name or identifier
+
+        Returns:
+            bool: True if the ticket was inserted, False if the number already exists,
+            or None if the insert failed
+        """
+        if not self.conn:
+            print("Not connected to Snowflake. Please check connection.")
+            return None
+
+        query = """
+            INSERT INTO TEST_DB.PUBLIC.TICKETS (
+                TICKETNUMBER, TITLE, DESCRIPTION, DUEDATETIME, PRIORITY, STATUS,
+                TECHNICIANEMAIL, USEREMAIL, USERID
+            )
+            SELECT %s, %s, %s, %s, %s, %s, %s, %s, %s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM TEST_DB.PUBLIC.TICKETS WHERE TICKETNUMBER = %s
+            )
+        """
+        params = (
+            ticket_number, title, description, due_date, priority, status,
+            technician_email, user_email, user_id, ticket_number
+        )
+        try:
+            with self.conn.cursor(snowflake.connector.DictCursor) as cur:
+                cur.execute(query, params)
+                results = cur.fetchall()
+        except snowflake.connector.errors.Error as e:
+            logger.error("Error inserting ticket %s: %s", ticket_number, e)
             return None
+        if not results or int(results[0].get('number of rows inserted', 0)) == 0:
+            return False
+        self.invalidate_reference_tickets_cache()
+        return True
 
     def close_connection(self):
         """Close the Snowflake connection."""
@@ -9,7 +9,16 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from src.processors.ai_processor import AIProcessor
 from src.processors.ticket_processor import TicketProcessor
-from src.processors.image_processor import ImageProcessor
+
+
+def __getattr__(name):
+    # ImageProcessor pulls in OpenCV and pytesseract, which the ticket pipeline does not
+    # need; import it the first time it is asked for instead of with the package
+    if name == 'ImageProcessor':
+        from src.processors.image_processor import ImageProcessor
+        return ImageProcessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'AIProcessor',
@@ -5,29 +5,129 @@ Handles metadata extraction, ticket classification, and resolution generation us
 
 import json
 import re
+from collections import Counter
 from typing import Dict, List, Optional
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from src.database import SnowflakeConnection
+from src.cache.llm_cache import LLMResponseCache
 
+# Returned by generate_resolution_note when the LLM gives no usable answer
+RESOLUTION_UNAVAILABLE_NOTE = "Resolution could not be generated at this time. Please try again later."
+
+# Set to True in classify_ticket's result when the LLM gave no answer and the
+# classification was built from similar tickets or defaults instead
+CLASSIFICATION_FALLBACK_FLAG = "FALLBACK"
+
+# The static instructions open each prompt and the ticket-specific details follow them,
+# so consecutive requests to a model share the longest possible identical prefix
+_EXTRACTION_PROMPT_PREFIX = """
+        Analyze the IT support ticket title and description given at the end of this prompt and extract the specified metadata in JSON format.
+        Ensure all fields are present. For urgency_level, analyze the impact and urgency based on the issue described.
+
+        Guidelines for urgency_level assessment:
+        - "Critical": System down, security breach, data loss, business-critical functions unavailable
+        - "High": Major functionality impaired, multiple users affected, workarounds difficult
+        - "Medium": Single user affected, workarounds available, non-critical functions impaired
+        - "Low": Minor issues, cosmetic problems, feature requests, general questions
+
+        Guidelines for error_messages extraction:
+        - Look for specific error codes, error numbers, or exact error text in quotes
+        - Include popup messages, dialog box text, or system-generated messages
+        - Examples: "Error 404", "Connection timeout", "Access denied", "File not found"
+        - If no specific error message is mentioned, extract any symptoms or failure descriptions
+
+        JSON Schema:
+        {
+            "main_issue": "What is the main issue or problem described?",
+            "affected_system": "What system or application is affected?",
+            "urgency_level": "Assess urgency based on impact and business criticality (Critical, High, Medium, or Low)",
+            "error_messages": "Extract any specific error messages, codes, or failure symptoms mentioned in the ticket",
+            "technical_keywords": ["list", "of", "technical", "terms", "separated", "by", "comma"],
+            "user_actions": "What actions was the user trying to perform when the issue occurred?",
+            "resolution_indicators": "What type of resolution approach or common fix might address this issue?",
+            "STATUS": "Open"
+        }
+"""
+
+_CLASSIFICATION_PROMPT_PREFIX = """
+        You are an expert IT support ticket classifier. Based on the new ticket details and similar historical tickets given below,
+        classify the new ticket for the following categories: ISSUETYPE, SUBISSUETYPE, TICKETCATEGORY, TICKETTYPE, and PRIORITY.
+        The STATUS should be 'Open'.
+\n\nIMPORTANT: For each classification field, especially SUBISSUETYPE, analyze the metadata and values of the similar historical tickets below. If any similar ticket has a clear value for SUBISSUETYPE, use the most relevant one as a strong suggestion for the new ticket. Only use "N/A" if absolutely no similar context or option applies. If unsure, select the closest reasonable option from the available list.\n\nBased on all the provided information and the available options, determine the classification for the New Ticket in JSON format.\nFor each classification field, provide both the `Value` (numerical ID) and the `Label` (descriptive name) from the provided options.\nIf a precise match cannot be determined for a field, choose the closest reasonable option or use "N/A" for the Label and an appropriate default/null for Value.\nThe `PRIORITY` should be re-evaluated based on the issue's urgency and impact, considering the initial priority and the provided priority options.\n\nJSON Schema:\n{\n    \"ISSUETYPE\": { \"Value\": \"numerical_id\", \"Label\": \"Descriptive Label\" },\n    \"SUBISSUETYPE\": { \"Value\": \"numerical_id\", \"Label\": \"Descriptive Label\" },\n    \"TICKETCATEGORY\": { \"Value\": \"numerical_id\", \"Label\": \"Descriptive Label\" },\n    \"TICKETTYPE\": { \"Value\": \"numerical_id\", \"Label\": \"Descriptive Label\" },\n    \"STATUS\": { \"Value\": \"numerical_id\", \"Label\": \"Descriptive Label\" },\n    \"PRIORITY\": { \"Value\": \"numerical_id\", \"Label\": \"Descriptive Label\" }\n}\n"""
+
+_RESOLUTION_PROMPT_PREFIX = """
+        You are an expert IT support analyst. Based on the extracted metadata from an IT support ticket given at the end of this prompt, generate a concise, actionable resolution note with clear, numbered steps for the end-user to follow. The resolution should directly address the main issue and context provided by the metadata. Do not include any generic or irrelevant steps. Do not reference unavailable information. Do not include any JSON or code formatting in your response—just the step-by-step resolution as plain text.
+
+        Instructions:
+        1. Generate a step-by-step resolution plan tailored to the main issue and context below.
+        2. The steps should be practical for an end-user to perform.
+        3. Do not include any JSON, code blocks, or explanations—just the resolution steps as plain text.
+        4. Number each step clearly.
+        5. If information is missing, focus only on the available metadata.
+"""
+
+_CLASSIFICATION_FIELDS = ["issuetype", "subissuetype", "ticketcategory", "tickettype", "priority", "status"]
 
 class AIProcessor:
     """
     Handles AI/LLM operations including metadata extraction, classification, and resolution generation.
     """
 
-    def __init__(self, db_connection: SnowflakeConnection, reference_data: Dict):
+    def __init__(self, db_connection: SnowflakeConnection, reference_data: Dict,
+                 llm_cache: Optional[LLMResponseCache] = None):
         """
         Initialize the AI processor.
 
         Args:
             db_connection (SnowflakeConnection): Database connection for LLM calls
             reference_data (dict): Reference data for classification mappings
+            llm_cache (LLMResponseCache, optional): Cache for identical extraction/classification prompts
         """
         self.db_connection = db_connection
         self.reference_data = reference_data
+        self.llm_cache = llm_cache
+        self._classification_options = self._build_classification_options()
+
+    def _build_classification_options(self) -> str:
+        """
+        Renders the available classification options once; they only depend on the reference data.
+        """
+        option_lines = ["\n\nAvailable Classification Options (Field: {Value: Label, ...}):\n"]
+        for field_name in _CLASSIFICATION_FIELDS:
+            if field_name in self.reference_data:
+                options_str = ", ".join([f'"{val}": "{label}"' for val, label in self.reference_data[field_name].items()])
+                option_lines.append(f"  {field_name.upper()}: {{{options_str}}}\n")
+            else:
+                option_lines.append(f"  {field_name.upper()}: No specific options provided.\n")
+        return "".join(option_lines)
+
+    def _call_llm_cached(self, prompt: str, model: str):
+        """
+        Calls the Cortex LLM for a JSON response, answering byte-identical prompts from the cache.
+
+        Args:
+            prompt (str): Prompt text
+            model (str): LLM model to use
+
+        Returns:
+            dict: Parsed LLM response, or None if the call failed
+        """
+        if self.llm_cache is None:
+            return self.db_connection.call_cortex_llm(prompt, model=model)
+
+        key = self.llm_cache.make_key(model, prompt)
+        cached = self.llm_cache.get(key)
+        if cached is not None:
+            print("Using cached LLM response")
+            return cached
+
+        response = self.db_connection.call_cortex_llm(prompt, model=model)
+        if response is not None:
+            self.llm_cache.set(key, response)
+        return response
 
     def extract_metadata(self, title: str, description: str, model: str = 'llama3-8b') -> Optional[Dict]:
         """
@@ -41,39 +141,12 @@ class AIProcessor:
         Returns:
             dict: Extracted metadata or None if failed
         """
-        prompt = f"""
-        Analyze the following IT support ticket title and description and extract the specified metadata in JSON format.
-        Ensure all fields are present. For urgency_level, analyze the impact and urgency based on the issue described.
-
+        prompt = f"""{_EXTRACTION_PROMPT_PREFIX}
         Ticket Title: "{title}"
         Ticket Description: "{description}"
-
-        Guidelines for urgency_level assessment:
-        - "Critical": System down, security breach, data loss, business-critical functions unavailable
-        - "High": Major functionality impaired, multiple users affected, workarounds difficult
-        - "Medium": Single user affected, workarounds available, non-critical functions impaired
-        - "Low": Minor issues, cosmetic problems, feature requests, general questions
-
-        Guidelines for error_messages extraction:
-        - Look for specific error codes, error numbers, or exact error text in quotes
-        - Include popup messages, dialog box text, or system-generated messages
-        - Examples: "Error 404", "Connection timeout", "Access denied", "File not found"
-        - If no specific error message is mentioned, extract any symptoms or failure descriptions
-
-        JSON Schema:
-        {{
-            "main_issue": "What is the main issue or problem described?",
-            "affected_system": "What system or application is affected?",
-            "urgency_level": "Assess urgency based on impact and business criticality (Critical, High, Medium, or Low)",
-            "error_messages": "Extract any specific error messages, codes, or failure symptoms mentioned in the ticket",
-            "technical_keywords": ["list", "of", "technical", "terms", "separated", "by", "comma"],
-            "user_actions": "What actions was the user trying to perform when the issue occurred?",
-            "resolution_indicators": "What type of resolution approach or common fix might address this issue?",
-            "STATUS": "Open"
-        }}
         """
         print("Extracting metadata with LLM...")
-        extracted_data = self.db_connection.call_cortex_llm(prompt, model=model)
+        extracted_data = self._call_llm_cached(prompt, model)
         if extracted_data:
             extracted_data["STATUS"] = "Open"
         return extracted_data
@@ -93,8 +166,6 @@ class AIProcessor:
         Returns:
             dict: Classification data or None if failed
         """
-        from collections import Counter
-
         # Summarize similar tickets
         summary = {}
         for field in ["ISSUETYPE", "SUBISSUETYPE", "TICKETCATEGORY", "TICKETTYPE", "PRIORITY"]:
@@ -103,28 +174,25 @@ class AIProcessor:
                 most_common, count = Counter(values).most_common(1)[0]
                 summary[field] = {"Value": most_common, "Count": count}
 
-        summary_str = "\nMost common classification values among similar tickets:\n"
+        summary_lines = ["\nMost common classification values among similar tickets:\n"]
         for field, info in summary.items():
             label = self.reference_data.get(field.lower(), {}).get(str(info["Value"]), "Unknown")
-            summary_str += f"{field}: {info['Value']} (Label: {label}, appeared {info['Count']} times)\n"
-
-        classification_prompt = f"""
-        You are an expert IT support ticket classifier. Based on the new ticket details and similar historical tickets,
-        classify the new ticket for the following categories: ISSUETYPE, SUBISSUETYPE, TICKETCATEGORY, TICKETTYPE, and PRIORITY.
-        The STATUS should be 'Open'.
+            summary_lines.append(f"{field}: {info['Value']} (Label: {label}, appeared {info['Count']} times)\n")
 
+        # Collect the prompt in pieces and join once instead of growing a string with +=
+        prompt_parts = [_CLASSIFICATION_PROMPT_PREFIX, self._classification_options, f"""
         New Ticket Title: "{new_ticket_data['title']}"
         New Ticket Description: "{new_ticket_data['description']}"
         New Ticket Extracted Metadata: {json.dumps(extracted_metadata, indent=2)}
         New Ticket Initial Priority: "{new_ticket_data['priority']}"
 
         Consider the following similar historical tickets for classification context:
-        """
+        """]
 
         MAX_SIMILAR_TICKETS_FOR_PROMPT = 15
         if similar_tickets:
             for i, ticket in enumerate(similar_tickets[:MAX_SIMILAR_TICKETS_FOR_PROMPT]):
-                classification_prompt += f"""
+                prompt_parts.append(f"""
                 --- Similar Ticket {i+1} ---
                 Title: {ticket.get('TITLE', 'N/A')[:100]}
                 ISSUE_TYPE: {ticket.get('ISSUETYPE', 'N/A')}
@@ -132,27 +200,15 @@ class AIProcessor:
                 CATEGORY: {ticket.get('TICKETCATEGORY', 'N/A')}
                 TYPE: {ticket.get('TICKETTYPE', 'N/A')}
                 PRIORITY: {ticket.get('PRIORITY', 'N/A')}
-                """
+                """)
         else:
-            classification_prompt += "\nNo similar historical tickets found to provide additional context."
+            prompt_parts.append("\nNo similar historical tickets found to provide additional context.")
 
-        classification_prompt += summary_str
-        classification_prompt += """
-\n\nAvailable Classification Options (Field: {Value: Label, ...}):\n"""
-        classification_fields = ["issuetype", "subissuetype", "ticketcategory", "tickettype", "priority", "status"]
-
-        for field_name in classification_fields:
-            if field_name in self.reference_data:
-                options_str = ", ".join([f'"{val}": "{label}"' for val, label in self.reference_data[field_name].items()])
-                classification_prompt += f"  {field_name.upper()}: {{{options_str}}}\n"
-            else:
-                classification_prompt += f"  {field_name.upper()}: No specific options provided.\n"
-
-        classification_prompt += """
-\n\nIMPORTANT: For each classification field, especially SUBISSUETYPE, analyze the metadata and values of the similar historical tickets above. If any similar ticket has a clear value for SUBISSUETYPE, use the most relevant one as a strong suggestion for the new ticket. Only use "N/A" if absolutely no similar context or option applies. If unsure, select the closest reasonable option from the available list.\n\nBased on all the provided information and the available options, determine the classification for the New Ticket in JSON format.\nFor each classification field, provide both the `Value` (numerical ID) and the `Label` (descriptive name) from the provided options.\nIf a precise match cannot be determined for a field, choose the closest reasonable option or use "N/A" for the Label and an appropriate default/null for Value.\nThe `PRIORITY` should be re-evaluated based on the issue's urgency and impact, considering the initial priority and the provided priority options.\n\nJSON Schema:\n{{\n    \"ISSUETYPE\": {{ \"Value\": \"numerical_id\", \"Label\": \"Descriptive Label\" }},\n    \"SUBISSUETYPE\": {{ \"Value\": \"numerical_id\", \"Label\": \"Descriptive Label\" }},\n    \"TICKETCATEGORY\": {{ \"Value\": \"numerical_id\", \"Label\": \"Descriptive Label\" }},\n    \"TICKETTYPE\": {{ \"Value\": \"numerical_id\", \"Label\": \"Descriptive Label\" }},\n    \"STATUS\": {{ \"Value\": \"numerical_id\", \"Label\": \"Descriptive Label\" }},\n    \"PRIORITY\": {{ \"Value\": \"numerical_id\", \"Label\": \"Descriptive Label\" }}\n}}\n"""
+        prompt_parts.extend(summary_lines)
+        classification_prompt = "".join(prompt_parts)
 
         print("Classifying ticket with LLM...")
-        classified_data = self.db_connection.call_cortex_llm(classification_prompt, model=model)
+        classified_data = self._call_llm_cached(classification_prompt, model)
 
         if classified_data is None:
             print("❌ LLM classification failed, creating fallback classification...")
@@ -173,6 +229,7 @@ class AIProcessor:
                     }
                     classified_data[field] = default_values.get(field, {"Value": "N/A", "Label": "Unknown"})
             classified_data["STATUS"] = {"Value": "1", "Label": "Open"}
+            classified_data[CLASSIFICATION_FALLBACK_FLAG] = True
             print("✅ Fallback classification created successfully")
 
         if classified_data and "status" in self.reference_data:
@@ -210,9 +267,7 @@ class AIProcessor:
         description = ticket_data.get('description', '')
 
         # Prepare a focused prompt for the LLM
-        prompt = f'''
-        You are an expert IT support analyst. Based on the following extracted metadata from an IT support ticket, generate a concise, actionable resolution note with clear, numbered steps for the end-user to follow. The resolution should directly address the main issue and context provided by the metadata. Do not include any generic or irrelevant steps. Do not reference unavailable information. Do not include any JSON or code formatting in your response—just the step-by-step resolution as plain text.
-
+        prompt = f'''{_RESOLUTION_PROMPT_PREFIX}
         Extracted Metadata:
         - Main Issue: {extracted_metadata.get('main_issue', 'N/A')}
         - Affected System: {extracted_metadata.get('affected_system', 'N/A')}
@@ -221,13 +276,6 @@ class AIProcessor:
         - Technical Keywords: {', '.join(extracted_metadata.get('technical_keywords', []))}
         - User Actions: {extracted_metadata.get('user_actions', 'N/A')}
         - Suggested Resolution Approach: {extracted_metadata.get('resolution_indicators', 'N/A')}
-
-        Instructions:
-        1. Generate a step-by-step resolution plan tailored to the main issue and context above.
-        2. The steps should be practical for an end-user to perform.
-        3. Do not include any JSON, code blocks, or explanations—just the resolution steps as plain text.
-        4. Number each step clearly.
-        5. If information is missing, focus only on the available metadata.
         '''
 
         print("Calling Cortex LLM for resolution generation...")
@@ -236,4 +284,4 @@ class AIProcessor:
         if isinstance(llm_response, str) and llm_response.strip():
             return llm_response.strip()
         else:
-            return "Resolution could not be generated at this time. Please try again later."
\ No newline at end of file
+            return RESOLUTION_UNAVAILABLE_NOTE
\ No newline at end of file
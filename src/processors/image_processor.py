@@ -6,6 +6,7 @@ Supports various image formats and extracts technical information from screensho
 
 import os
 import base64
+import logging
 import json
 import re
 from typing import Dict, List, Optional, Union, Tuple
@@ -15,6 +16,61 @@ import cv2
 import numpy as np
 from pathlib import Path
 import mimetypes
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# Shared OCR worker threads; Tesseract runs as a subprocess, so threads overlap the OCR work
+# and reusing them avoids starting a new executor for every batch of images
+_OCR_POOL = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 4), thread_name_prefix='ocr')
+
+# Common error keywords to look for in OCR text
+ERROR_DIALOG_KEYWORDS = [
+    'error', 'warning', 'exception', 'failed', 'cannot', 'unable',
+    'access denied', 'permission', 'timeout', 'connection', 'network',
+    'file not found', 'invalid', 'corrupt', 'crash', 'freeze'
+]
+
+# Case-insensitive lookahead alternation: one pass over the OCR text finds every
+# keyword occurrence without lowercasing a copy of the text first
+_ERROR_DIALOG_KEYWORD_RE = re.compile(
+    '(?=(' + '|'.join(sorted(map(re.escape, ERROR_DIALOG_KEYWORDS), key=len, reverse=True)) + '))',
+    re.IGNORECASE
+)
+
+
+# Technical keyword categories searched for in OCR text
+TECHNICAL_CONTENT_CATEGORIES = {
+    'applications': ['outlook', 'excel', 'word', 'powerpoint', 'teams', 'chrome', 'firefox', 'edge', 'internet explorer'],
+    'operating_systems': ['windows', 'mac', 'linux', 'android', 'ios'],
+    'system_components': ['registry', 'driver', 'service', 'process', 'dll', 'exe'],
+    'network_terms': ['wifi', 'ethernet', 'vpn', 'firewall', 'dns', 'dhcp', 'proxy'],
+    'hardware_terms': ['printer', 'monitor', 'keyboard', 'mouse', 'cpu', 'memory', 'disk']
+}
+
+_ERROR_NUMBER_RE = re.compile(r'error\s*[:\-]?\s*(\d+)')
+_WINDOWS_PATH_RE = re.compile(r'[A-Za-z]:\\[^\s]+')
+_URL_RE = re.compile(r'https?://[^\s]+')
+
+# Common technical terms to look for - focus on specific technical content
+_TECH_TERM_PATTERNS = [re.compile(pattern) for pattern in (
+    r'\b[A-Z]{2,}[0-9]+\b',  # Error codes like HTTP404, DNS53
+    r'\b\w+\.exe\b',         # Executable files
+    r'\b\w+\.dll\b',         # DLL files
+    r'\b\w+\.com\b',         # Domain names
+    r'\b\d+\.\d+\.\d+\.\d+\b',  # IP addresses
+    r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b',  # Application names like "Microsoft Outlook"
+    r'\b0x[0-9A-Fa-f]+\b',  # Hexadecimal error codes
+    r'\b[A-Z]{3,}\b'         # Acronyms like VPN, DNS, SMTP
+)]
+
+# Error code formats recognised by the rule-based classifier
+_ERROR_CODE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'error\s*[:\-]?\s*(\d+)',
+    r'0x[0-9a-fA-F]+',
+    r'[A-Z]{2,}\d{3,}',
+    r'\b\d{4,}\b'
+)]
 
 
 class ImageProcessor:
@@ -55,12 +111,12 @@ class ImageProcessor:
             # Check file extension
             file_ext = Path(image_path).suffix.lower()
             if file_ext not in self.supported_formats:
-                print(f"Unsupported image format: {file_ext}")
+                logger.warning("Unsupported image format: %s", file_ext)
                 return False
             
             # Check if file exists
             if not os.path.exists(image_path):
-                print(f"Image file not found: {image_path}")
+                logger.warning("Image file not found: %s", image_path)
                 return False
             
             # Try to open with PIL to verify it's a valid image
@@ -69,7 +125,7 @@ class ImageProcessor:
             
             return True
         except Exception as e:
-            print(f"Image validation failed: {e}")
+            logger.warning("Image validation failed: %s", e)
             return False
 
     def preprocess_image(self, image_path: str) -> np.ndarray:
@@ -86,27 +142,57 @@ class ImageProcessor:
         try:
             # Load image with OpenCV
             image = cv2.imread(image_path)
-            
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Apply noise reduction
-            denoised = cv2.medianBlur(gray, 3)
-            
-            # Enhance contrast using CLAHE (Contrast Limited Adaptive Histogram Equalization)
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            enhanced = clahe.apply(denoised)
-            
-            # Apply threshold to get binary image
-            _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            
-            return binary
+            return self._preprocess_array(image)
         except Exception as e:
-            print(f"Image preprocessing failed: {e}")
+            logger.warning("Image preprocessing failed: %s", e)
             # Fallback: return original image as grayscale
             image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
             return image
 
+    def _preprocess_array(self, image: np.ndarray) -> np.ndarray:
+        """
+        Apply the OCR preprocessing steps to an already decoded BGR image.
+
+        Args:
+            image (np.ndarray): Image array as returned by cv2.imread / cv2.imdecode
+
+        Returns:
+            np.ndarray: Preprocessed binary image array
+        """
+        # Convert to grayscale
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+        # Apply noise reduction
+        denoised = cv2.medianBlur(gray, 3)
+        
+        # Enhance contrast using CLAHE (Contrast Limited Adaptive Histogram Equalization)
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        enhanced = clahe.apply(denoised)
+        
+        # Apply threshold to get binary image
+        _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        
+        return binary
+
+    def _ocr_preprocessed(self, processed_image: np.ndarray) -> str:
+        """
+        Run Tesseract on a preprocessed image array and clean the result.
+
+        Args:
+            processed_image (np.ndarray): Output of the preprocessing step
+
+        Returns:
+            str: Cleaned OCR text
+        """
+        # Configure Tesseract for better accuracy
+        custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!@#$%^&*()_+-=[]{}|;:,.<>?/~` '
+        
+        # Extract text using Tesseract
+        extracted_text = pytesseract.image_to_string(processed_image, config=custom_config)
+        
+        # Clean up the extracted text
+        return self._clean_extracted_text(extracted_text)
+
     def extract_text_from_image(self, image_path: str) -> str:
         """
         Extract text from image using OCR (Optical Character Recognition).
@@ -120,23 +206,75 @@ class ImageProcessor:
         try:
             # Preprocess image for better OCR
             processed_image = self.preprocess_image(image_path)
+            cleaned_text = self._ocr_preprocessed(processed_image)
             
-            # Configure Tesseract for better accuracy
-            custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!@#$%^&*()_+-=[]{}|;:,.<>?/~` '
+            logger.debug("Extracted text from image: %d characters", len(cleaned_text))
+            return cleaned_text
+            
+        except Exception as e:
+            logger.error("OCR text extraction failed: %s", e)
+            return ""
+
+    def extract_text_from_bytes(self, data: bytes) -> str:
+        """
+        Extract text from encoded image bytes (e.g. an upload or attachment)
+        without writing them to a temporary file first.
+
+        Args:
+            data (bytes): Encoded image content (PNG, JPEG, ...)
+
+        Returns:
+            str: Extracted text from the image
+        """
+        try:
+            image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                logger.error("OCR text extraction failed: could not decode image bytes")
+                return ""
             
-            # Extract text using Tesseract
-            extracted_text = pytesseract.image_to_string(processed_image, config=custom_config)
+            try:
+                processed_image = self._preprocess_array(image)
+            except Exception as e:
+                logger.warning("Image preprocessing failed: %s", e)
+                processed_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             
-            # Clean up the extracted text
-            cleaned_text = self._clean_extracted_text(extracted_text)
+            cleaned_text = self._ocr_preprocessed(processed_image)
             
-            print(f"Extracted text from image: {len(cleaned_text)} characters")
+            logger.debug("Extracted text from image: %d characters", len(cleaned_text))
             return cleaned_text
             
         except Exception as e:
-            print(f"OCR text extraction failed: {e}")
+            logger.error("OCR text extraction failed: %s", e)
             return ""
 
+    def extract_texts_from_bytes(self, images: List[bytes], timeout: Optional[float] = 30) -> List[str]:
+        """
+        Extract text from several encoded images concurrently on the shared OCR pool.
+
+        Args:
+            images (list): Encoded image contents
+            timeout (float, optional): Seconds to wait for the whole batch before giving up
+                on the images that are not done yet
+
+        Returns:
+            list: Extracted text for each image, in input order ("" for images that failed or timed out)
+        """
+        if not images:
+            return []
+        if len(images) == 1:
+            return [self.extract_text_from_bytes(images[0])]
+
+        futures = [_OCR_POOL.submit(self.extract_text_from_bytes, data) for data in images]
+        _, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            # Queued jobs are dropped so they do not hold up later callers of the shared pool;
+            # jobs already running cannot be interrupted and finish in the background
+            for future in not_done:
+                future.cancel()
+            logger.error("OCR text extraction timed out after %s seconds for %d of %d images",
+                         timeout, len(not_done), len(images))
+        return ["" if future in not_done else future.result() for future in futures]
+
     def _clean_extracted_text(self, text: str) -> str:
         """
         Clean and normalize extracted text from OCR.
@@ -160,22 +298,20 @@ class ImageProcessor:
         
         return cleaned_text
 
-    def detect_error_dialogs(self, image_path: str) -> Dict:
+    def detect_error_dialogs(self, image_path: str, extracted_text: Optional[str] = None) -> Dict:
         """
         Detect common error dialog patterns in the image.
         Looks for error windows, dialog boxes, and warning messages.
 
         Args:
             image_path (str): Path to the image file
+            extracted_text (str, optional): OCR text already extracted from the image;
+                OCR is only run again when this is not provided
 
         Returns:
             dict: Information about detected error dialogs
         """
         try:
-            # Load image
-            image = cv2.imread(image_path)
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
             # Template matching for common error dialog elements
             error_indicators = {
                 'error_icon': False,
@@ -184,21 +320,24 @@ class ImageProcessor:
                 'error_keywords': []
             }
             
-            # Extract text to look for error keywords
-            extracted_text = self.extract_text_from_image(image_path)
-            
-            # Common error keywords to look for
-            error_keywords = [
-                'error', 'warning', 'exception', 'failed', 'cannot', 'unable',
-                'access denied', 'permission', 'timeout', 'connection', 'network',
-                'file not found', 'invalid', 'corrupt', 'crash', 'freeze'
-            ]
+            # Extract text to look for error keywords; without text from the caller the
+            # image is loaded here, and an unreadable image fails detection outright
+            if extracted_text is None:
+                image = cv2.imread(image_path)
+                if image is None:
+                    logger.error("Error dialog detection failed: could not read image %s", image_path)
+                    return {'error_icon': False, 'warning_icon': False, 'dialog_box': False, 'error_keywords': []}
+                try:
+                    processed_image = self._preprocess_array(image)
+                except Exception as e:
+                    logger.warning("Image preprocessing failed: %s", e)
+                    processed_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+                extracted_text = self._ocr_preprocessed(processed_image)
             
             found_keywords = []
             if extracted_text:
-                for keyword in error_keywords:
-                    if keyword.lower() in extracted_text.lower():
-                        found_keywords.append(keyword)
+                matched = {hit.lower() for hit in _ERROR_DIALOG_KEYWORD_RE.findall(extracted_text)}
+                found_keywords = [keyword for keyword in ERROR_DIALOG_KEYWORDS if keyword in matched]
             
             error_indicators['error_keywords'] = found_keywords
             
@@ -209,7 +348,7 @@ class ImageProcessor:
             return error_indicators
             
         except Exception as e:
-            print(f"Error dialog detection failed: {e}")
+            logger.error("Error dialog detection failed: %s", e)
             return {'error_icon': False, 'warning_icon': False, 'dialog_box': False, 'error_keywords': []}
 
     def extract_image_metadata(self, image_path: str) -> Dict:
@@ -236,8 +375,8 @@ class ImageProcessor:
             # Extract text using OCR
             extracted_text = self.extract_text_from_image(image_path)
             
-            # Detect error dialogs
-            error_info = self.detect_error_dialogs(image_path)
+            # Detect error dialogs, reusing the OCR text from above
+            error_info = self.detect_error_dialogs(image_path, extracted_text)
             
             # Analyze extracted text for technical keywords
             technical_analysis = self._analyze_technical_content(extracted_text)
@@ -256,7 +395,7 @@ class ImageProcessor:
             return metadata
             
         except Exception as e:
-            print(f"Image metadata extraction failed: {e}")
+            logger.error("Image metadata extraction failed: %s", e)
             return {}
 
     def _analyze_technical_content(self, text: str) -> Dict:
@@ -274,40 +413,26 @@ class ImageProcessor:
         
         text_lower = text.lower()
         
-        # Technical keyword categories
-        technical_categories = {
-            'applications': ['outlook', 'excel', 'word', 'powerpoint', 'teams', 'chrome', 'firefox', 'edge', 'internet explorer'],
-            'operating_systems': ['windows', 'mac', 'linux', 'android', 'ios'],
-            'error_codes': [],
-            'file_paths': [],
-            'urls': [],
-            'ip_addresses': [],
-            'email_addresses': [],
-            'system_components': ['registry', 'driver', 'service', 'process', 'dll', 'exe'],
-            'network_terms': ['wifi', 'ethernet', 'vpn', 'firewall', 'dns', 'dhcp', 'proxy'],
-            'hardware_terms': ['printer', 'monitor', 'keyboard', 'mouse', 'cpu', 'memory', 'disk']
-        }
-        
         found_categories = {}
         
         # Search for keywords in each category
-        for category, keywords in technical_categories.items():
+        for category, keywords in TECHNICAL_CONTENT_CATEGORIES.items():
             found_items = [keyword for keyword in keywords if keyword in text_lower]
             if found_items:
                 found_categories[category] = found_items
         
         # Extract error codes (pattern: Error followed by numbers)
-        error_codes = re.findall(r'error\s*[:\-]?\s*(\d+)', text_lower)
+        error_codes = _ERROR_NUMBER_RE.findall(text_lower)
         if error_codes:
             found_categories['error_codes'] = error_codes
         
         # Extract file paths
-        file_paths = re.findall(r'[A-Za-z]:\\[^\s]+', text)
+        file_paths = _WINDOWS_PATH_RE.findall(text)
         if file_paths:
             found_categories['file_paths'] = file_paths
         
         # Extract URLs
-        urls = re.findall(r'https?://[^\s]+', text)
+        urls = _URL_RE.findall(text)
         if urls:
             found_categories['urls'] = urls
         
@@ -325,7 +450,7 @@ class ImageProcessor:
             dict: Classification results based on image content
         """
         if not self.db_connection:
-            print("No database connection available for LLM classification")
+            logger.warning("No database connection available for LLM classification")
             return None
 
         try:
@@ -388,7 +513,7 @@ class ImageProcessor:
             }}
             """
 
-            print("Classifying image content with LLM...")
+            logger.debug("Classifying image content with LLM...")
             classification_result = self.db_connection.call_cortex_llm(prompt, model=model)
 
             if classification_result:
@@ -402,7 +527,7 @@ class ImageProcessor:
             return classification_result
 
         except Exception as e:
-            print(f"Image classification failed: {e}")
+            logger.error("Image classification failed: %s", e)
             # Fallback to rule-based classification
             return self._rule_based_classification(image_metadata)
 
@@ -664,21 +789,8 @@ class ImageProcessor:
 
         # Extract additional technical terms from text
         if extracted_text.strip():
-            # Common technical terms to look for - focus on specific technical content
-            tech_patterns = [
-                r'\b[A-Z]{2,}[0-9]+\b',  # Error codes like HTTP404, DNS53
-                r'\b\w+\.exe\b',         # Executable files
-                r'\b\w+\.dll\b',         # DLL files
-                r'\b\w+\.com\b',         # Domain names
-                r'\b\d+\.\d+\.\d+\.\d+\b',  # IP addresses
-                r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b',  # Application names like "Microsoft Outlook"
-                r'\b0x[0-9A-Fa-f]+\b',  # Hexadecimal error codes
-                r'\b[A-Z]{3,}\b'         # Acronyms like VPN, DNS, SMTP
-            ]
-
-            import re
-            for pattern in tech_patterns:
-                matches = re.findall(pattern, original_text)
+            for pattern in _TECH_TERM_PATTERNS:
+                matches = pattern.findall(original_text)
                 # Filter out generic matches
                 specific_matches = [match for match in matches if match.lower() not in generic_terms]
                 all_keywords.extend(specific_matches)
@@ -714,16 +826,8 @@ class ImageProcessor:
 
         if extracted_text.strip():
             # Look for error codes in text
-            import re
-            code_patterns = [
-                r'error\s*[:\-]?\s*(\d+)',
-                r'0x[0-9a-fA-F]+',
-                r'[A-Z]{2,}\d{3,}',
-                r'\b\d{4,}\b'
-            ]
-
-            for pattern in code_patterns:
-                matches = re.findall(pattern, original_text, re.IGNORECASE)
+            for pattern in _ERROR_CODE_PATTERNS:
+                matches = pattern.findall(original_text)
                 error_codes.extend(matches)
 
             classification["error_codes"] = list(set(error_codes))[:5]
@@ -896,7 +1000,7 @@ class ImageProcessor:
                 encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
             return encoded_string
         except Exception as e:
-            print(f"Failed to convert image to base64: {e}")
+            logger.error("Failed to convert image to base64: %s", e)
             return None
 
     def save_processed_image_data(self, image_result: Dict, output_path: Optional[str] = None) -> bool:
@@ -915,23 +1019,26 @@ class ImageProcessor:
                 image_name = os.path.splitext(os.path.basename(image_result['image_path']))[0]
                 output_path = f"processed_image_{image_name}.json"
 
-            # Remove large binary data for JSON storage
-            save_data = image_result.copy()
-            if 'metadata' in save_data and 'image_info' in save_data['metadata']:
+            # Remove large binary data for JSON storage. Only the dicts on the path to
+            # image_info are rebuilt, so the caller's result is left untouched
+            save_data = image_result
+            metadata = image_result.get('metadata')
+            if metadata and 'image_info' in metadata:
                 # Keep only essential image info
+                image_info = metadata['image_info']
                 essential_info = {
-                    'filename': save_data['metadata']['image_info'].get('filename'),
-                    'format': save_data['metadata']['image_info'].get('format'),
-                    'size': save_data['metadata']['image_info'].get('size')
+                    'filename': image_info.get('filename'),
+                    'format': image_info.get('format'),
+                    'size': image_info.get('size')
                 }
-                save_data['metadata']['image_info'] = essential_info
+                save_data = {**image_result, 'metadata': {**metadata, 'image_info': essential_info}}
 
             with open(output_path, 'w', encoding='utf-8') as f:
                 json.dump(save_data, f, indent=2, ensure_ascii=False)
 
-            print(f"Processed image data saved to: {output_path}")
+            logger.info("Processed image data saved to: %s", output_path)
             return True
 
         except Exception as e:
-            print(f"Failed to save processed image data: {e}")
+            logger.error("Failed to save processed image data: %s", e)
             return False
@@ -11,6 +11,28 @@ from sklearn.metrics.pairwise import cosine_similarity
 import scipy.sparse
 
 
+# Technical keyword categories recognised in ticket text
+TECHNICAL_KEYWORDS = {
+    'applications': ['outlook', 'excel', 'word', 'powerpoint', 'teams', 'chrome', 'firefox', 'safari', 'edge'],
+    'systems': ['windows', 'mac', 'linux', 'server', 'database', 'sql', 'oracle', 'mysql'],
+    'network': ['wifi', 'ethernet', 'vpn', 'firewall', 'router', 'switch', 'dns', 'dhcp'],
+    'hardware': ['printer', 'monitor', 'keyboard', 'mouse', 'laptop', 'desktop', 'hard drive', 'memory'],
+    'errors': ['error', 'crash', 'freeze', 'slow', 'timeout', 'connection', 'failed', 'denied'],
+    'actions': ['login', 'password', 'access', 'install', 'update', 'backup', 'restore', 'sync']
+}
+
+# One alternation over every keyword, wrapped in a lookahead so a single scan also
+# reports overlapping hits (e.g. 'sql' inside 'mysql'), matching substring semantics
+_TECHNICAL_KEYWORD_RE = re.compile(
+    '(?=(' + '|'.join(sorted((re.escape(word) for words in TECHNICAL_KEYWORDS.values() for word in words),
+                             key=len, reverse=True)) + '))'
+)
+
+
+# Error/code references such as "error 0x80070005" or "code: E-1234" in lowercased text
+_ERROR_CODE_RE = re.compile(r'\b(?:error|code)\s*[:\-]?\s*([a-z0-9\-]+)\b')
+
+
 class TicketProcessor:
     """
     Handles ticket processing operations including similarity matching and technical analysis.
@@ -38,9 +60,6 @@ class TicketProcessor:
         if not extracted_metadata:
             return [], []
 
-        search_conditions = []
-        params = []
-
         main_issue = extracted_metadata.get("main_issue")
         affected_system = extracted_metadata.get("affected_system")
         # Ensure affected_system is a string
@@ -49,30 +68,24 @@ class TicketProcessor:
         error_messages = extracted_metadata.get("error_messages")
         technical_keywords = extracted_metadata.get("technical_keywords", [])
 
-        # Use OR for all main fields to increase match chance
-        if main_issue and main_issue != "N/A":
-            search_conditions.append("(TITLE ILIKE %s OR DESCRIPTION ILIKE %s)")
-            params.extend([f"%{main_issue}%", f"%{main_issue}%"])
-        if affected_system and affected_system != "N/A":
-            search_conditions.append("(TITLE ILIKE %s OR DESCRIPTION ILIKE %s)")
-            params.extend([f"%{affected_system}%", f"%{affected_system}%"])
-        if error_messages and error_messages != "N/A":
-            search_conditions.append("(DESCRIPTION ILIKE %s)")
-            params.append(f"%{error_messages}%")
-
-        # Use OR for keywords
-        keyword_conditions = []
-        for keyword in technical_keywords:
-            if keyword and keyword != "N/A":
-                keyword_conditions.append("(TITLE ILIKE %s OR DESCRIPTION ILIKE %s)")
-                params.extend([f"%{keyword}%", f"%{keyword}%"])
-
-        # Combine conditions
-        all_conditions = search_conditions.copy()
-        if keyword_conditions:
-            all_conditions.extend(keyword_conditions)
-
-        return all_conditions, params
+        # Any field matching any pattern is a hit, so collect one pattern list per
+        # column (deduplicated, order kept) and test each column with a single ILIKE ANY
+        title_terms = [main_issue, affected_system, *technical_keywords]
+        description_terms = [main_issue, affected_system, error_messages, *technical_keywords]
+        title_patterns = list(dict.fromkeys(f"%{term}%" for term in title_terms if term and term != "N/A"))
+        description_patterns = list(dict.fromkeys(f"%{term}%" for term in description_terms if term and term != "N/A"))
+
+        column_conditions = []
+        params = []
+        for column, patterns in (("TITLE", title_patterns), ("DESCRIPTION", description_patterns)):
+            if patterns:
+                column_conditions.append(f"{column} ILIKE ANY ({', '.join(['%s'] * len(patterns))})")
+                params.extend(patterns)
+
+        if not column_conditions:
+            return [], []
+
+        return ["(" + " OR ".join(column_conditions) + ")"], params
 
     def summarize_similar_tickets(self, similar_tickets: List[Dict]) -> Dict:
         """
@@ -163,24 +176,18 @@ class TicketProcessor:
         """
         text = f"{title} {description}".lower()
 
-        # Define technical keyword categories
-        keywords = {
-            'applications': ['outlook', 'excel', 'word', 'powerpoint', 'teams', 'chrome', 'firefox', 'safari', 'edge'],
-            'systems': ['windows', 'mac', 'linux', 'server', 'database', 'sql', 'oracle', 'mysql'],
-            'network': ['wifi', 'ethernet', 'vpn', 'firewall', 'router', 'switch', 'dns', 'dhcp'],
-            'hardware': ['printer', 'monitor', 'keyboard', 'mouse', 'laptop', 'desktop', 'hard drive', 'memory'],
-            'errors': ['error', 'crash', 'freeze', 'slow', 'timeout', 'connection', 'failed', 'denied'],
-            'actions': ['login', 'password', 'access', 'install', 'update', 'backup', 'restore', 'sync']
-        }
+        # Scan the text once, then bucket the hits by category
+        matched = set(_TECHNICAL_KEYWORD_RE.findall(text))
 
         found_keywords = {}
-        for category, words in keywords.items():
-            found = [word for word in words if word in text]
-            if found:
-                found_keywords[category] = found
+        if matched:
+            for category, words in TECHNICAL_KEYWORDS.items():
+                found = [word for word in words if word in matched]
+                if found:
+                    found_keywords[category] = found
 
         # Extract error codes (pattern: numbers/letters)
-        error_codes = re.findall(r'\b(?:error|code)\s*[:\-]?\s*([a-z0-9\-]+)\b', text)
+        error_codes = _ERROR_CODE_RE.findall(text)
         if error_codes:
             found_keywords['error_codes'] = error_codes
 